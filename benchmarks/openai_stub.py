@@ -0,0 +1,125 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers every completion with a canned text that echoes the question, either
+as one response or streamed as server-sent events with a configurable delay
+before the first token and between tokens. Useful for exercising the ``@ai``
+chat command and measuring time to first token without an API key:
+
+    python -m benchmarks.openai_stub --port 8001 --first-token-ms 400
+    OPENAI_BASE_URL=http://localhost:8001/v1 make app
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI()
+app.state.first_token_delay = 0.4
+app.state.token_delay = 0.03
+app.state.tokens = 60
+
+
+def _answer(messages: list[dict], tokens: int) -> list[str]:
+    question = messages[-1]["content"] if messages else ""
+    words = f"Stub answer to: {question}.".split() or ["..."]
+    return [("" if i == 0 else " ") + words[i % len(words)] for i in range(tokens)]
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def _usage(body: dict, tokens: list[str]) -> dict:
+    prompt_tokens = sum(
+        len(message.get("content", "").split()) for message in body.get("messages", [])
+    )
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+    }
+
+
+def _usage_chunk(completion_id: str, model: str, body: dict, tokens: list[str]):
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [],
+        "usage": _usage(body, tokens),
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    tokens = _answer(body.get("messages", []), request.app.state.tokens)
+
+    if not body.get("stream"):
+        await asyncio.sleep(
+            request.app.state.first_token_delay
+            + request.app.state.token_delay * len(tokens)
+        )
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": _usage(body, tokens),
+        }
+
+    async def events():
+        yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+        await asyncio.sleep(request.app.state.first_token_delay)
+        for token in tokens:
+            yield _chunk(completion_id, model, {"content": token})
+            await asyncio.sleep(request.app.state.token_delay)
+        yield _chunk(completion_id, model, {}, finish_reason="stop")
+        if body.get("stream_options", {}).get("include_usage"):
+            yield _usage_chunk(completion_id, model, body, tokens)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=int, default=400)
+    parser.add_argument("--token-ms", type=int, default=30)
+    parser.add_argument("--tokens", type=int, default=60)
+    args = parser.parse_args()
+
+    app.state.first_token_delay = args.first_token_ms / 1000
+    app.state.token_delay = args.token_ms / 1000
+    app.state.tokens = args.tokens
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Latency of the post full-text search.
+
+Inserts synthetic posts (random sentences over a Zipf-like vocabulary) into
+the configured Postgres database inside a transaction, runs a mix of common,
+rare and phrase queries through ``search_posts`` (first pages, follow-up
+pages, author-filtered and date-filtered) and reports latency percentiles.
+Everything is rolled back at the end. Run the migrations first, then:
+
+    DEBUG=False python -m benchmarks.posts_search --posts 3000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from src.apps.friends.models import FriendRequest  # noqa
+from src.apps.posts.search import search_posts
+from src.databases import session_factory
+
+VOCABULARY_SIZE = 20_000
+
+SEED_USERS = text(
+    """
+    INSERT INTO users (first_name, last_name, email, username, hashed_password,
+                       is_active, email_verified)
+    SELECT 'Bench', 'Author ' || i, 'bench.author.' || i || '@example.com',
+           'bench_author_' || i, NULL, true, true
+    FROM generate_series(1, :count) AS i
+    RETURNING id
+    """
+)
+
+# Word w<n> is picked with probability ~ 1/n, so low numbers are very common
+# and high numbers are rare, like words in real text.
+WORD = f"'w' || floor(exp(random() * ln({VOCABULARY_SIZE})))::int"
+
+SEED_POSTS = text(
+    f"""
+    INSERT INTO posts (title, content, user_id, created_at, updated_at,
+                       like_count, comment_count)
+    SELECT
+        (SELECT string_agg({WORD}, ' ') FROM generate_series(1, 6) WHERE i > 0),
+        (SELECT string_agg({WORD}, ' ') FROM generate_series(1, 60) WHERE i > 0),
+        (CAST(:user_ids AS integer[]))[1 + i % :authors],
+        now() - (random() * interval '365 days'),
+        now(), 0, 0
+    FROM generate_series(1, :count) AS i
+    """
+)
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+
+    def ms(q: float) -> float:
+        return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+    return (
+        f'n={len(samples):5d}  p50={ms(0.50):7.2f}ms  p95={ms(0.95):7.2f}ms  '
+        f'p99={ms(0.99):7.2f}ms  mean={statistics.mean(samples) * 1000:7.2f}ms'
+    )
+
+
+def sample_terms(count: int) -> dict[str, list[str]]:
+    def word(low: int, high: int) -> str:
+        return f'w{random.randint(low, high)}'
+
+    return {
+        'common word': [word(1, 20) for _ in range(count)],
+        'rare word': [word(5000, VOCABULARY_SIZE - 1) for _ in range(count)],
+        'two words': [f'{word(1, 200)} {word(200, 2000)}' for _ in range(count)],
+        'phrase': [f'"{word(1, 50)} {word(1, 50)}"' for _ in range(count)],
+        'negation': [f'{word(100, 1000)} -{word(1, 20)}' for _ in range(count)],
+    }
+
+
+async def timed(session, samples: list[float], *args) -> tuple[list, str | None]:
+    started_at = time.perf_counter()
+    result = await search_posts(session, *args)
+    samples.append(time.perf_counter() - started_at)
+    return result
+
+
+async def main(posts: int, authors: int, samples: int, limit: int) -> None:
+    async with session_factory() as session:
+        started_at = time.perf_counter()
+        user_ids = (await session.execute(SEED_USERS, {'count': authors})).scalars()
+        await session.execute(
+            SEED_POSTS,
+            {
+                'count': posts,
+                'user_ids': list(user_ids),
+                'authors': authors,
+            },
+        )
+        await session.execute(text('ANALYZE posts'))
+        print(f'seeded {posts} posts in {time.perf_counter() - started_at:.1f}s')
+
+        author_id = await session.scalar(
+            text("SELECT id FROM users WHERE username = 'bench_author_1'")
+        )
+        since = datetime.now(timezone.utc) - timedelta(days=30)
+
+        for kind, terms in sample_terms(samples).items():
+            first, second, by_author, recent = [], [], [], []
+            for term in terms:
+                _, cursor = await timed(
+                    session, first, term, None, None, None, None, limit
+                )
+                if cursor:
+                    await timed(session, second, term, None, None, None, cursor, limit)
+                await timed(
+                    session, by_author, term, author_id, None, None, None, limit
+                )
+                await timed(session, recent, term, None, since, None, None, limit)
+
+            print(f'{kind}:')
+            print('  first page: ', percentiles(first))
+            if second:
+                print('  second page:', percentiles(second))
+            print('  by author:  ', percentiles(by_author))
+            print('  last 30 days:', percentiles(recent))
+
+        plan = await session.execute(
+            text(
+                'EXPLAIN ANALYZE SELECT id FROM posts '
+                "WHERE search_vector @@ websearch_to_tsquery('simple', 'w300 w1200')"
+            )
+        )
+        print('\n'.join(row[0] for row in plan))
+
+        # Nothing is committed: drop the synthetic posts and authors.
+        await session.rollback()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=3_000_000)
+    parser.add_argument('--authors', type=int, default=10_000)
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.posts, args.authors, args.samples, args.limit))
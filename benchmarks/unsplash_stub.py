@@ -0,0 +1,79 @@
+"""Local stand-in for the Unsplash photo search API.
+
+Serves ``GET /search/photos`` with a made-up photo URL per query (or no
+results for queries containing "nothing"), after a configurable delay, and
+enforces a request quota per window the way Unsplash does: the remaining
+quota is reported in ``X-Ratelimit-Remaining`` and requests over it get 429
+with ``Retry-After``. Useful for exercising ``@photo``, the result cache and
+the circuit breaker without an access key:
+
+    python -m benchmarks.unsplash_stub --port 8002 --quota 50 --window 60
+    UNSPLASH_BASE_URL=http://localhost:8002 make app
+"""
+
+import argparse
+import asyncio
+import math
+import time
+from urllib.parse import quote
+
+import uvicorn
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI()
+app.state.latency = 0.1
+app.state.quota = 50
+app.state.window = 60.0
+app.state.window_started_at = time.monotonic()
+app.state.used = 0
+
+
+@app.get("/search/photos")
+async def search_photos(request: Request, query: str = Query(...)):
+    state = request.app.state
+    now = time.monotonic()
+    if now - state.window_started_at >= state.window:
+        state.window_started_at, state.used = now, 0
+    retry_after = math.ceil(state.window - (now - state.window_started_at))
+
+    if state.used >= state.quota:
+        return JSONResponse(
+            status_code=429,
+            content={"errors": ["Rate Limit Exceeded"]},
+            headers={"Retry-After": str(retry_after), "X-Ratelimit-Remaining": "0"},
+        )
+    state.used += 1
+    await asyncio.sleep(state.latency)
+
+    results = []
+    if "nothing" not in query.lower():
+        url = f"https://images.example.com/{quote(query)}.jpg"
+        results.append({"id": quote(query), "urls": {"regular": url}})
+    return JSONResponse(
+        content={"total": len(results), "total_pages": 1, "results": results},
+        headers={
+            "X-Ratelimit-Limit": str(state.quota),
+            "X-Ratelimit-Remaining": str(state.quota - state.used),
+            "Retry-After": str(retry_after),
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--quota", type=int, default=50)
+    parser.add_argument("--window", type=float, default=60.0)
+    args = parser.parse_args()
+
+    app.state.latency = args.latency_ms / 1000
+    app.state.quota = args.quota
+    app.state.window = args.window
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Keystroke latency of the people-search autocomplete.
+
+Inserts synthetic users into the configured Postgres database inside a
+transaction, types sample usernames and email fragments one key at a time
+through ``autocomplete_users`` and reports latency percentiles. Everything is
+rolled back at the end. Run the migrations first, then:
+
+    DEBUG=False python -m benchmarks.users_search --users 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.apps.friends.models import FriendRequest  # noqa
+from src.apps.posts.models import PostModel  # noqa
+from src.apps.users.search import autocomplete_cache, autocomplete_users
+from src.databases import session_factory
+
+SEED_USERS = text(
+    """
+    INSERT INTO users (first_name, last_name, email, username, hashed_password,
+                       is_active, email_verified)
+    SELECT 'Bench', 'User ' || i,
+           'bench.' || substr(md5(i::text), 1, 10) || '@example.com',
+           'bench_' || substr(md5((i * 7)::text), 1, 4) || '_' || i,
+           NULL, true, true
+    FROM generate_series(1, :count) AS i
+    """
+)
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+
+    def ms(q: float) -> float:
+        return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+    return (
+        f'n={len(samples):5d}  p50={ms(0.50):7.2f}ms  p95={ms(0.95):7.2f}ms  '
+        f'p99={ms(0.99):7.2f}ms  mean={statistics.mean(samples) * 1000:7.2f}ms'
+    )
+
+
+def keystrokes(username: str, email: str) -> list[str]:
+    middle = email[6:14]
+    return [username[:i] for i in range(1, len(username) + 1)] + [
+        middle[:i] for i in range(3, len(middle) + 1)
+    ]
+
+
+async def main(users: int, samples: int, limit: int) -> None:
+    async with session_factory() as session:
+        started_at = time.perf_counter()
+        await session.execute(SEED_USERS, {'count': users})
+        await session.execute(text('ANALYZE users'))
+        print(f'seeded {users} users in {time.perf_counter() - started_at:.1f}s')
+
+        rows = await session.execute(
+            text(
+                "SELECT username, email FROM users "
+                "WHERE username LIKE 'bench\\_%' ORDER BY random() LIMIT :n"
+            ),
+            {'n': samples},
+        )
+        terms = [term for row in rows for term in keystrokes(*row)]
+
+        cold, warm = [], []
+        for term in terms:
+            autocomplete_cache.clear()
+            started_at = time.perf_counter()
+            await autocomplete_users(session, term, limit)
+            cold.append(time.perf_counter() - started_at)
+
+        random.shuffle(terms)
+        for term in terms:
+            started_at = time.perf_counter()
+            await autocomplete_users(session, term, limit)
+            warm.append(time.perf_counter() - started_at)
+
+        print('cold cache:', percentiles(cold))
+        print('warm cache:', percentiles(warm))
+
+        plan = await session.execute(
+            text(
+                'EXPLAIN ANALYZE SELECT id FROM users '
+                "WHERE lower(username) COLLATE \"C\" >= 'bench_a' "
+                "AND lower(username) COLLATE \"C\" < 'bench_b' "
+                'ORDER BY lower(username) COLLATE "C" LIMIT 10'
+            )
+        )
+        print('\n'.join(row[0] for row in plan))
+
+        # Nothing is committed: drop the synthetic users.
+        await session.rollback()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.samples, args.limit))
@@ -1,14 +1,24 @@
 import logging
-
-from fastapi import FastAPI, HTTPException, Request, WebSocketException, status
+import math
+
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketException,
+    status,
+)
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from pymongo.errors import PyMongoError
 from sqlalchemy.exc import SQLAlchemyError
 
 from src.apps.chats.exceptions import (
+    BotCommandsBusyException,
     ChatNotFoundException,
     ChatPermissionsNotFoundException,
+    HandshakeRejectedException,
     MessageNotFoundException,
     WrongTypeException,
 )
@@ -54,6 +64,40 @@ def exception_registry(app: FastAPI) -> None:
             content={"message": f"{exc.message}"},
         )
 
+    @app.exception_handler(HandshakeRejectedException)
+    async def handle_handshake_rejected_exception(
+        websocket: WebSocket, exc: HandshakeRejectedException
+    ):
+        logger.warning("%s: %s", exc.__class__.__name__, exc.message)
+
+        response = JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": f"{exc.message}", "retry_after": exc.retry_after},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+        try:
+            await websocket.send_denial_response(response)
+        except RuntimeError:
+            # Server without the denial response extension: accept and close
+            # with "try again later" so the client can still read the delay.
+            await websocket.accept()
+            await websocket.close(
+                code=status.WS_1013_TRY_AGAIN_LATER,
+                reason=f"retry_after={exc.retry_after:.2f}",
+            )
+
+    @app.exception_handler(BotCommandsBusyException)
+    def handle_bot_commands_busy_exception(
+        request: Request, exc: BotCommandsBusyException
+    ):
+        logger.warning("%s: %s", exc.__class__.__name__, exc.message)
+
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": f"{exc.message}", "retry_after": exc.retry_after},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+
     @app.exception_handler(ValidationError)
     def handle_validation_error_exception(request: Request, exc: ValidationError):
         errors = [f"{error['loc'][0]}: {error['msg']}" for error in exc.errors()]
@@ -89,7 +133,9 @@ def exception_registry(app: FastAPI) -> None:
         logger.error("%s: %s", exc.__class__.__name__, exc.detail)
 
         return JSONResponse(
-            status_code=exc.status_code, content={"message": f"{exc.detail}"}
+            status_code=exc.status_code,
+            content={"message": f"{exc.detail}"},
+            headers=exc.headers,
         )
 
     @app.exception_handler(WebSocketException)
@@ -8,7 +8,22 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from src.api.exception_handlers import exception_registry
 from src.api.v1.routers import v1_router, v1_ws_router
+from src.apps.ai.dependencies import create_openai_service, create_unsplash_service
+from src.apps.chats.dependencies import start_bot_commands
+from src.apps.chats.summaries import chat_summaries
+from src.apps.friends.suggestions import friend_suggestions
+from src.apps.posts.counters import post_counter_reconciler
+from src.apps.posts.trending import trending_posts
+from src.apps.users.deletion import account_purger
+from src.apps.users.mail import mail_dispatcher
+from src.apps.users.revocation import (
+    load_revoked_tokens,
+    purge_expired_revoked_tokens,
+    sync_revoked_tokens,
+)
+from src.apps.users.security import password_hasher
 from src.databases import init_mongo
+from src.scheduler import scheduler
 from src.settings.config import settings
 
 logging.basicConfig(
@@ -21,12 +36,66 @@ logging.basicConfig(
 async def lifespan(app: FastAPI):
     mongo_client = AsyncIOMotorClient(settings.MONGODB_URL)
     await init_mongo(mongo_client)
+    app.state.openai_service = create_openai_service()
+    app.state.unsplash_service = create_unsplash_service()
+    start_bot_commands(app)
+
+    await load_revoked_tokens()
+    await friend_suggestions.load_snapshot()
+    scheduler.add_job(
+        'sync_revoked_tokens',
+        settings.REVOKED_TOKENS_SYNC_SECONDS,
+        sync_revoked_tokens,
+    )
+    scheduler.add_job(
+        'purge_expired_revoked_tokens',
+        settings.REVOKED_TOKENS_PURGE_SECONDS,
+        purge_expired_revoked_tokens,
+    )
+    scheduler.add_job(
+        'purge_deleted_accounts',
+        settings.ACCOUNT_DELETION_PURGE_SECONDS,
+        account_purger.run,
+    )
+    scheduler.add_job(
+        'refresh_friend_suggestions',
+        settings.FRIEND_SUGGESTIONS_SNAPSHOT_SECONDS,
+        friend_suggestions.refresh,
+    )
+    scheduler.add_job(
+        'refresh_chat_summaries',
+        settings.CHAT_SUMMARY_REFRESH_SECONDS,
+        lambda: chat_summaries.refresh(app.state.openai_service),
+    )
+    scheduler.add_job(
+        'reconcile_post_counters',
+        settings.POST_COUNTERS_RECONCILE_SECONDS,
+        post_counter_reconciler.run,
+    )
+    scheduler.add_job(
+        'refresh_trending_posts',
+        settings.TRENDING_REFRESH_SECONDS,
+        trending_posts.refresh,
+    )
+    if settings.MAIL_DISPATCHER_IN_PROCESS:
+        scheduler.add_job(
+            'dispatch_mail', settings.MAIL_POLL_SECONDS, mail_dispatcher.drain
+        )
+    scheduler.start()
 
     yield
 
+    await scheduler.stop()
+    await mail_dispatcher.pool.close()
+    await app.state.bot_commands.stop()
+    await app.state.openai_service.close()
+    await app.state.unsplash_service.close()
+
     mongo_client.close()
     logging.info('MongoDB connection closed')
 
+    password_hasher.shutdown()
+
 
 def create_app():
     app = FastAPI(
@@ -1,25 +1,92 @@
+from importlib.util import find_spec
 from typing import Annotated
 
+import httpx
 from fastapi import Depends
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+from starlette.requests import HTTPConnection
 
 from src.apps.ai.services import OpenAIService, UnsplashService
-from src.apps.users.models import User
 from src.apps.users.routers.auth import get_current_user
+from src.apps.users.schemas import UserPrincipal
+from src.cache import TTLCache
+from src.circuit_breaker import CircuitBreaker
 from src.settings.config import settings
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
+def create_openai_service() -> OpenAIService:
+    """One pooled client per worker; created in the app lifespan."""
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+        ),
+    )
+    client = AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        http_client=http_client,
+        # The SDK passes its own per-request timeout, overriding the pool's.
+        timeout=Timeout(
+            settings.OPENAI_TIMEOUT_SECONDS,
+            connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS,
+        ),
+        max_retries=settings.OPENAI_MAX_RETRIES,
+    )
+    return OpenAIService(
+        client=client,
+        model=settings.OPENAI_MODEL,
+        max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+        queue_timeout=settings.OPENAI_QUEUE_TIMEOUT_SECONDS,
+        cache=TTLCache(
+            ttl=settings.OPENAI_CACHE_TTL_SECONDS,
+            max_size=settings.OPENAI_CACHE_MAX_SIZE,
+        ),
+        max_cached_chars=settings.OPENAI_CACHE_MAX_ANSWER_CHARS,
+        input_price=settings.OPENAI_INPUT_PRICE_PER_1M_TOKENS,
+        output_price=settings.OPENAI_OUTPUT_PRICE_PER_1M_TOKENS,
+    )
 
-def get_openai_service() -> OpenAIService:
-    return OpenAIService(client)
 
+def create_unsplash_service() -> UnsplashService:
+    """One keep-alive client per worker; created in the app lifespan."""
+    client = httpx.AsyncClient(
+        base_url=settings.UNSPLASH_BASE_URL,
+        headers={'Authorization': f'Client-ID {settings.UNSPLASH_ACCESS_KEY}'},
+        timeout=httpx.Timeout(
+            settings.UNSPLASH_TIMEOUT_SECONDS,
+            connect=settings.UNSPLASH_CONNECT_TIMEOUT_SECONDS,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.UNSPLASH_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UNSPLASH_MAX_CONNECTIONS,
+        ),
+        # HTTP/2 needs the optional h2 package (httpx[http2]).
+        http2=settings.UNSPLASH_HTTP2 and find_spec('h2') is not None,
+    )
+    return UnsplashService(
+        client=client,
+        cache=TTLCache(
+            ttl=settings.UNSPLASH_CACHE_TTL_SECONDS,
+            max_size=settings.UNSPLASH_CACHE_MAX_SIZE,
+        ),
+        breaker=CircuitBreaker(
+            name='unsplash',
+            failure_threshold=settings.UNSPLASH_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.UNSPLASH_BREAKER_RESET_SECONDS,
+        ),
+    )
 
-def get_unsplash_service() -> UnsplashService:
-    return UnsplashService(access_key=settings.UNSPLASH_ACCESS_KEY)
 
+def get_openai_service(connection: HTTPConnection) -> OpenAIService:
+    return connection.app.state.openai_service
 
-CurrentUserDep = Annotated[User, Depends(get_current_user)]
+
+def get_unsplash_service(connection: HTTPConnection) -> UnsplashService:
+    return connection.app.state.unsplash_service
+
+
+CurrentUserDep = Annotated[UserPrincipal, Depends(get_current_user)]
 
 OpenAIServiceDep = Annotated[OpenAIService, Depends(get_openai_service)]
 UnsplashServiceDep = Annotated[UnsplashService, Depends(get_unsplash_service)]
@@ -13,3 +13,12 @@ The functionality of our project:
 
 Respond politely, briefly, and when appropriate — suggest relevant actions.
 """
+
+summary_prompt = """
+You maintain a running summary of a group conversation in a messenger app.
+
+You get the current summary and the messages that came after it. Reply with
+the updated summary only: who said or decided what, open questions and facts
+that later messages may refer to. Drop small talk. Keep it under {max_words}
+words.
+"""
@@ -1,12 +1,11 @@
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Query, status
 
 from src.apps.ai.dependencies import (
     CurrentUserDep,
     OpenAIServiceDep,
-    get_unsplash_service,
+    UnsplashServiceDep,
 )
 from src.apps.ai.schemas import AskResponseSchema, AskSchema
-from src.apps.ai.services import UnsplashService
 
 ai_router = APIRouter()
 
@@ -35,8 +34,8 @@ async def ask_question(
 )
 async def get_photo(
     user: CurrentUserDep,
+    service: UnsplashServiceDep,
     query: str = Query(..., min_length=1),
-    service: UnsplashService = Depends(get_unsplash_service),
 ):
     image_url = await service.search_photo(query)
     return {"image_url": image_url}
@@ -1,74 +1,366 @@
+import asyncio
+import hashlib
 import logging
-from dataclasses import dataclass
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable
 
 import httpx
-from openai import APIError, AuthenticationError, OpenAI, OpenAIError, RateLimitError
+from openai import (
+    APIError,
+    APITimeoutError,
+    AsyncOpenAI,
+    AuthenticationError,
+    OpenAIError,
+    RateLimitError,
+)
 
 from src.apps.ai.exceptions import OpenAIServiceException, UnsplashServiceException
-from src.apps.ai.prompts import system_prompt
+from src.apps.ai.prompts import summary_prompt, system_prompt
+from src.cache import TTLCache
+from src.circuit_breaker import CircuitBreaker
+from src.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
+def normalize_prompt(text: str) -> str:
+    return ' '.join(text.split()).casefold().rstrip('?!. ')
+
+
+@dataclass(frozen=True)
+class Completion:
+    content: str
+    seconds: float
+    prompt_tokens: int
+    completion_tokens: int
+
+
+@dataclass
+class _Flight:
+    """One upstream completion, replayed to every caller asking the same question."""
+
+    deltas: list[str] = field(default_factory=list)
+    result: Completion | None = None
+    error: Exception | None = None
+    _updated: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def _notify(self) -> None:
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def push(self, delta: str) -> None:
+        self.deltas.append(delta)
+        self._notify()
+
+    def finish(self, result: Completion) -> None:
+        self.result = result
+        self._notify()
+
+    def fail(self, error: Exception) -> None:
+        self.error = error
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            updated = self._updated
+            while index < len(self.deltas):
+                yield self.deltas[index]
+                index += 1
+            if self.error is not None:
+                raise self.error
+            if self.result is not None:
+                return
+            await updated.wait()
+
+
 @dataclass
 class OpenAIService:
-    client: OpenAI
+    client: AsyncOpenAI
+    model: str
+    max_concurrency: int
+    queue_timeout: float
+    cache: TTLCache[tuple[str, str, str], Completion]
+    max_cached_chars: int
+    input_price: float
+    output_price: float
+    _limiter: asyncio.Semaphore = field(init=False, repr=False)
+    _in_flight: int = field(default=0, init=False)
+    _flights: dict[tuple[str, str, str], _Flight] = field(
+        default_factory=dict, init=False
+    )
+    _tasks: set[asyncio.Task] = field(default_factory=set, init=False, repr=False)
+
+    def __post_init__(self):
+        self._limiter = asyncio.Semaphore(self.max_concurrency)
 
-    async def ask(self, user_input: str) -> str:
+    @asynccontextmanager
+    async def _slot(self):
+        queued_at = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
-                model='gpt-4o-mini',
-                messages=[
-                    {'role': 'system', 'content': system_prompt},
-                    {'role': 'user', 'content': user_input},
-                ],
+            await asyncio.wait_for(self._limiter.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            metrics.counter('openai_requests_total', result='rejected').inc()
+            logger.warning(
+                'OpenAI request rejected after waiting %.1fs for a slot',
+                self.queue_timeout,
             )
-            return response.choices[0].message.content
-        except RateLimitError as e:
-            logger.error(f'OpenAI rate limit exceeded: {str(e)}')
             raise OpenAIServiceException(
-                'OpenAI rate limit exceeded. Please try again later.'
+                'AI assistant is busy. Please try again later.'
+            )
+        metrics.histogram('openai_queue_seconds').observe(
+            time.perf_counter() - queued_at
+        )
+
+        self._in_flight += 1
+        metrics.gauge('openai_requests_in_flight').set(self._in_flight)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            metrics.gauge('openai_requests_in_flight').set(self._in_flight)
+            self._limiter.release()
+
+    @asynccontextmanager
+    async def _request(self):
+        """Holds a concurrency slot for one call and maps client errors."""
+        async with self._slot():
+            started_at = time.perf_counter()
+            try:
+                yield
+                metrics.counter('openai_requests_total', result='ok').inc()
+            except APITimeoutError as e:
+                metrics.counter('openai_requests_total', result='timeout').inc()
+                logger.error(f'OpenAI request timed out: {str(e)}')
+                raise OpenAIServiceException(
+                    'OpenAI service timed out. Please try again later.'
+                )
+            except RateLimitError as e:
+                metrics.counter('openai_requests_total', result='error').inc()
+                logger.error(f'OpenAI rate limit exceeded: {str(e)}')
+                raise OpenAIServiceException(
+                    'OpenAI rate limit exceeded. Please try again later.'
+                )
+            except AuthenticationError as e:
+                metrics.counter('openai_requests_total', result='error').inc()
+                logger.error(f'OpenAI authentication error: {str(e)}')
+                raise OpenAIServiceException(
+                    'Authentication error with OpenAI service.'
+                )
+            except APIError as e:
+                metrics.counter('openai_requests_total', result='error').inc()
+                logger.error(f'OpenAI API error: {str(e)}')
+                raise OpenAIServiceException(
+                    'OpenAI API error. Please try again later.'
+                )
+            except OpenAIError as e:
+                metrics.counter('openai_requests_total', result='error').inc()
+                logger.error(f'OpenAI error: {str(e)}')
+                raise OpenAIServiceException(
+                    f'Error communicating with OpenAI: {str(e)}'
+                )
+            except Exception as e:
+                metrics.counter('openai_requests_total', result='error').inc()
+                logger.error(f'Unexpected error in OpenAI service: {str(e)}')
+                raise OpenAIServiceException(
+                    'Unexpected error occurred while processing your request.'
+                )
+            finally:
+                metrics.histogram('openai_request_seconds').observe(
+                    time.perf_counter() - started_at
+                )
+
+    def _messages(self, user_input: str, context: str) -> list[dict]:
+        messages = [{'role': 'system', 'content': system_prompt}]
+        if context:
+            messages.append(
+                {
+                    'role': 'system',
+                    'content': f'The conversation in this chat so far:\n{context}',
+                }
+            )
+        messages.append({'role': 'user', 'content': user_input})
+        return messages
+
+    async def _complete(
+        self, user_input: str, context: str, on_delta: Callable[[str], None]
+    ) -> Completion:
+        started_at = time.perf_counter()
+        parts, usage = [], None
+        async with self._request():
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(user_input, context),
+                stream=True,
+                stream_options={'include_usage': True},
             )
-        except AuthenticationError as e:
-            logger.error(f'OpenAI authentication error: {str(e)}')
-            raise OpenAIServiceException('Authentication error with OpenAI service.')
-        except APIError as e:
-            logger.error(f'OpenAI API error: {str(e)}')
-            raise OpenAIServiceException('OpenAI API error. Please try again later.')
-        except OpenAIError as e:
-            logger.error(f'OpenAI error: {str(e)}')
-            raise OpenAIServiceException(f'Error communicating with OpenAI: {str(e)}')
+            async with stream:
+                async for chunk in stream:
+                    usage = chunk.usage or usage
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    if not parts:
+                        metrics.histogram('openai_first_token_seconds').observe(
+                            time.perf_counter() - started_at
+                        )
+                    parts.append(chunk.choices[0].delta.content)
+                    on_delta(parts[-1])
+        return Completion(
+            content=''.join(parts),
+            seconds=time.perf_counter() - started_at,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    async def _fly(
+        self, key: tuple[str, str, str], user_input: str, context: str, flight: _Flight
+    ):
+        try:
+            result = await self._complete(user_input, context, flight.push)
+        except asyncio.CancelledError:
+            flight.fail(OpenAIServiceException())
+            raise
         except Exception as e:
-            logger.error(f'Unexpected error in OpenAI service: {str(e)}')
-            raise OpenAIServiceException(
-                'Unexpected error occurred while processing your request.'
+            flight.fail(e)
+        else:
+            if len(result.content) <= self.max_cached_chars:
+                self.cache.set(key, result)
+                metrics.gauge('openai_cache_entries').set(len(self.cache))
+            flight.finish(result)
+        finally:
+            self._flights.pop(key, None)
+
+    def _record_saved(self, result: str, completion: Completion, waited: float):
+        metrics.counter('openai_cache_total', result=result).inc()
+        metrics.counter('openai_cache_saved_seconds_total').inc(
+            max(completion.seconds - waited, 0)
+        )
+        metrics.counter('openai_cache_saved_tokens_total').inc(
+            completion.prompt_tokens + completion.completion_tokens
+        )
+        metrics.counter('openai_cache_saved_usd_total').inc(
+            (
+                completion.prompt_tokens * self.input_price
+                + completion.completion_tokens * self.output_price
             )
+            / 1_000_000
+        )
+
+    async def stream(self, user_input: str, context: str = '') -> AsyncIterator[str]:
+        """
+        Yields the answer in content deltas as the model produces them.
+        Answers are cached by model, normalized prompt and context, and
+        concurrent identical questions share one upstream completion.
+        """
+        started_at = time.perf_counter()
+        key = (
+            self.model,
+            normalize_prompt(user_input),
+            hashlib.sha256(context.encode()).hexdigest() if context else '',
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record_saved('hit', cached, 0)
+            yield cached.content
+            return
+
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if not shared:
+            metrics.counter('openai_cache_total', result='miss').inc()
+            flight = self._flights[key] = _Flight()
+            # A task of its own, so the completion finishes (and is cached)
+            # even if the caller that started it goes away.
+            task = asyncio.create_task(self._fly(key, user_input, context, flight))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        async for delta in flight.follow():
+            yield delta
+        if shared:
+            self._record_saved(
+                'coalesced', flight.result, time.perf_counter() - started_at
+            )
+
+    async def ask(self, user_input: str, context: str = '') -> str:
+        return ''.join([delta async for delta in self.stream(user_input, context)])
+
+    async def summarize(self, summary: str, transcript: str, max_tokens: int) -> str:
+        """Folds new messages into a conversation summary; never cached."""
+        async with self._request():
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        'role': 'system',
+                        # Roughly 3/4 of a word per token.
+                        'content': summary_prompt.format(max_words=max_tokens * 3 // 4),
+                    },
+                    {
+                        'role': 'user',
+                        'content': f'Current summary:\n{summary or "(none yet)"}\n\n'
+                        f'New messages:\n{transcript}',
+                    },
+                ],
+                max_tokens=max_tokens,
+            )
+            return response.choices[0].message.content.strip()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.client.close()
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
 
 
 @dataclass
 class UnsplashService:
-    access_key: str
-    base_url: str = 'https://api.unsplash.com'
+    """
+    Photo search over one pooled client owned by the app lifespan; the client
+    carries the base URL, auth header and timeouts.
+    """
+
+    client: httpx.AsyncClient
+    cache: TTLCache[str, str]
+    breaker: CircuitBreaker
 
     async def search_photo(self, query: str) -> str:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f'{self.base_url}/search/photos',
-                    params={'query': query, 'per_page': 1},
-                    headers={'Authorization': f'Client-ID {self.access_key}'},
-                    timeout=10.0,
-                )
+        key = ' '.join(query.split()).casefold()
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.counter('unsplash_cache_total', result='hit').inc()
+            return cached
+        metrics.counter('unsplash_cache_total', result='miss').inc()
 
-                response.raise_for_status()
+        if not self.breaker.allow():
+            raise UnsplashServiceException(
+                'Unsplash service is temporarily unavailable. Please try again later.'
+            )
 
-                data = response.json()
-                if not data.get('results') or len(data['results']) == 0:
-                    return f'No photos found for query: {query}'
+        started_at = time.perf_counter()
+        try:
+            response = await self.client.get(
+                '/search/photos', params={'query': query, 'per_page': 1}
+            )
+            response.raise_for_status()
 
-                return data['results'][0]['urls']['regular']
+            data = response.json()
+            if not data.get('results') or len(data['results']) == 0:
+                result = f'No photos found for query: {query}'
+            else:
+                result = data['results'][0]['urls']['regular']
 
         except httpx.TimeoutException:
+            self.breaker.record_failure()
             logger.error(f'Timeout while searching Unsplash for: {query}')
             raise UnsplashServiceException(
                 'Unsplash service timed out. Please try again later.'
@@ -77,6 +369,15 @@ class UnsplashService:
             status_code = e.response.status_code
             logger.error(f'HTTP error {status_code} from Unsplash: {str(e)}')
 
+            if status_code == 429:
+                # Rate limited: stop calling until the window is over.
+                self.breaker.open(_retry_after(e.response))
+            elif status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                # Unsplash answered; the request itself was wrong.
+                self.breaker.release()
+
             if status_code == 401:
                 raise UnsplashServiceException(
                     'Authentication error with Unsplash service.'
@@ -91,8 +392,25 @@ class UnsplashService:
                 raise UnsplashServiceException(
                     f'Unsplash service error (HTTP {status_code}).'
                 )
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
         except Exception as e:
+            self.breaker.record_failure()
             logger.error(f'Unexpected error in Unsplash service: {str(e)}')
             raise UnsplashServiceException(
                 'Unexpected error occurred while processing your request.'
             )
+        finally:
+            metrics.histogram('unsplash_request_seconds').observe(
+                time.perf_counter() - started_at
+            )
+
+        self.breaker.record_success()
+        if response.headers.get('X-Ratelimit-Remaining') == '0':
+            # Last request of this window: fail fast instead of collecting 429s.
+            self.breaker.open(_retry_after(response))
+        return self.cache.set(key, result)
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable
+from uuid import UUID, uuid4
+
+from src.apps.ai.exceptions import AIServiceException
+from src.apps.chats.entities import Message
+from src.apps.chats.exceptions import BotCommandsBusyException
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BOT_SENDER_ID = 777
+
+
+class BotCommandKind(str, Enum):
+    AI = 'ai'
+    PHOTO = 'photo'
+
+
+@dataclass(frozen=True)
+class BotCommand:
+    kind: BotCommandKind
+    chat_id: UUID
+    argument: str
+    # The user's message that carried the command.
+    message_id: UUID
+    # Id of the bot's reply; fixed up front so retries and streamed deltas
+    # all refer to the same message.
+    reply_id: UUID = field(default_factory=uuid4)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+def parse_bot_command(message: Message) -> BotCommand | None:
+    lowered = message.content.lower()
+    for kind in BotCommandKind:
+        marker = f'@{kind.value}'
+        if f'{marker} ' in lowered:
+            argument = message.content[lowered.index(marker) + len(marker) :].strip()
+            return BotCommand(
+                kind=kind,
+                chat_id=message.chat_id,
+                argument=argument,
+                message_id=message.id,
+            )
+    return None
+
+
+BotCommandHandler = Callable[[BotCommand], Awaitable[None]]
+BotCommandFailureHandler = Callable[[BotCommand, Exception], Awaitable[None]]
+
+
+@dataclass
+class BotCommandQueue:
+    """
+    In-process queue of bot commands. Chats are sharded over a fixed set of
+    workers, each draining its own bounded queue, so the commands of one chat
+    run one at a time in the order they were sent. Transient service errors
+    are retried with exponential backoff; when a shard is full new commands
+    are rejected rather than queued without bound.
+    """
+
+    workers: int
+    max_size: int
+    max_attempts: int
+    retry_backoff: float
+    retry_after: float
+    drain_timeout: float
+    _shards: list[asyncio.Queue] = field(default_factory=list, init=False)
+    _tasks: list[asyncio.Task] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        self._shards = [asyncio.Queue(self.max_size) for _ in range(self.workers)]
+
+    def _shard(self, chat_id: UUID) -> asyncio.Queue:
+        return self._shards[chat_id.int % self.workers]
+
+    def ensure_capacity(self, command: BotCommand) -> None:
+        if self._shard(command.chat_id).full():
+            metrics.counter(
+                'bot_commands_total', command=command.kind.value, result='rejected'
+            ).inc()
+            raise BotCommandsBusyException(retry_after=self.retry_after)
+
+    def submit(self, command: BotCommand) -> None:
+        try:
+            self._shard(command.chat_id).put_nowait(command)
+        except asyncio.QueueFull:
+            # Only reachable if the shard filled up between ensure_capacity()
+            # and here; the user's message is already stored by then.
+            metrics.counter(
+                'bot_commands_total', command=command.kind.value, result='dropped'
+            ).inc()
+            logger.warning(
+                "Dropping '@%s' command for chat with id '%s': queue is full",
+                command.kind.value,
+                command.chat_id,
+            )
+            return
+        metrics.gauge('bot_commands_queued').inc()
+
+    def start(
+        self, handler: BotCommandHandler, on_failure: BotCommandFailureHandler
+    ) -> None:
+        logger.info('Starting %s bot command workers', self.workers)
+        for index, shard in enumerate(self._shards):
+            self._tasks.append(
+                asyncio.create_task(
+                    self._work(shard, handler, on_failure),
+                    name=f'bot_commands_{index}',
+                )
+            )
+
+    async def stop(self) -> None:
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.join() for shard in self._shards)),
+                self.drain_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                'Stopping bot command workers with %s commands still queued',
+                sum(shard.qsize() for shard in self._shards),
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(
+        self,
+        shard: asyncio.Queue,
+        handler: BotCommandHandler,
+        on_failure: BotCommandFailureHandler,
+    ) -> None:
+        while True:
+            command = await shard.get()
+            metrics.gauge('bot_commands_queued').dec()
+            metrics.histogram('bot_command_queue_seconds').observe(
+                time.perf_counter() - command.enqueued_at
+            )
+            started_at = time.perf_counter()
+            try:
+                await self._run(command, handler, on_failure)
+            except Exception:
+                logger.exception(
+                    "Bot command for chat with id '%s' failed", command.chat_id
+                )
+            finally:
+                metrics.histogram(
+                    'bot_command_seconds', command=command.kind.value
+                ).observe(time.perf_counter() - started_at)
+                shard.task_done()
+
+    async def _run(
+        self,
+        command: BotCommand,
+        handler: BotCommandHandler,
+        on_failure: BotCommandFailureHandler,
+    ) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await handler(command)
+            except AIServiceException as e:
+                if attempt == self.max_attempts:
+                    error = e
+                    break
+                metrics.counter(
+                    'bot_commands_total', command=command.kind.value, result='retry'
+                ).inc()
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            except Exception as e:
+                error = e
+                break
+            else:
+                metrics.counter(
+                    'bot_commands_total', command=command.kind.value, result='ok'
+                ).inc()
+                return
+
+        metrics.counter(
+            'bot_commands_total', command=command.kind.value, result='failed'
+        ).inc()
+        await on_failure(command, error)
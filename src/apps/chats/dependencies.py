@@ -1,10 +1,20 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, Query, WebSocketException, status
-from openai import OpenAI
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketException,
+    status,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
 
-from src.apps.ai.services import OpenAIService, UnsplashService
+from src.apps.ai.dependencies import OpenAIServiceDep, UnsplashServiceDep
+from src.apps.chats.commands import BotCommandQueue
 from src.apps.chats.entities import ChatPermissions
 from src.apps.chats.repositories import (
     BaseChatPermissionsRepository,
@@ -16,10 +26,12 @@ from src.apps.chats.repositories import (
 )
 from src.apps.chats.schemas import Order, Pagination
 from src.apps.chats.services import BaseChatService, ChatService
+from src.apps.chats.websocket.admission import HandshakeAdmission
 from src.apps.chats.websocket.connections import ConnectionManager
-from src.apps.users.dependencies import CurrentWebsocketUserDep
-from src.apps.users.models import User
+from src.apps.users.dependencies import get_current_websocket_user
 from src.apps.users.routers.auth import get_current_user
+from src.apps.users.schemas import UserPrincipal
+from src.databases import get_async_db
 from src.settings.config import settings
 
 
@@ -50,16 +62,31 @@ def get_connection_manager() -> ConnectionManager:
     return ConnectionManager()
 
 
+handshake_admission = HandshakeAdmission(
+    max_concurrency=settings.WS_HANDSHAKE_MAX_CONCURRENCY,
+    max_queue=settings.WS_HANDSHAKE_MAX_QUEUE,
+    queue_timeout=settings.WS_HANDSHAKE_QUEUE_TIMEOUT,
+    retry_after=settings.WS_HANDSHAKE_RETRY_AFTER,
+    retry_jitter=settings.WS_HANDSHAKE_RETRY_JITTER,
+)
+
+
+def get_handshake_admission() -> HandshakeAdmission:
+    return handshake_admission
+
+
+def get_bot_command_queue(connection: HTTPConnection) -> BotCommandQueue:
+    return connection.app.state.bot_commands
+
+
 ChatRepositoryDep = Annotated[BaseChatRepository, Depends(get_chat_repo)]
 MessageRepositoryDep = Annotated[BaseMessageRepository, Depends(get_message_repo)]
 ChatPermissionsRepositoryDep = Annotated[
     BaseChatPermissionsRepository, Depends(get_chat_permissions_repo)
 ]
 ConnectionManagerDep = Annotated[ConnectionManager, Depends(get_connection_manager)]
-
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-ai_service = OpenAIService(client=openai_client)
-unsplash_service = UnsplashService(access_key=settings.UNSPLASH_ACCESS_KEY)
+HandshakeAdmissionDep = Annotated[HandshakeAdmission, Depends(get_handshake_admission)]
+BotCommandQueueDep = Annotated[BotCommandQueue, Depends(get_bot_command_queue)]
 
 
 def get_chat_service(
@@ -67,6 +94,9 @@ def get_chat_service(
     message_repo: MessageRepositoryDep,
     chat_permissions_repo: ChatPermissionsRepositoryDep,
     connection_manager: ConnectionManagerDep,
+    ai_service: OpenAIServiceDep,
+    unsplash_service: UnsplashServiceDep,
+    bot_commands: BotCommandQueueDep,
 ) -> BaseChatService:
     return ChatService(
         chat_repo=chat_repo,
@@ -75,17 +105,42 @@ def get_chat_service(
         connection_manager=connection_manager,
         ai_service=ai_service,
         unsplash_service=unsplash_service,
+        bot_commands=bot_commands,
     )
 
 
+def start_bot_commands(app: FastAPI) -> BotCommandQueue:
+    """Creates the bot command queue and starts its workers; call in the lifespan."""
+    bot_commands = BotCommandQueue(
+        workers=settings.BOT_COMMANDS_WORKERS,
+        max_size=settings.BOT_COMMANDS_QUEUE_SIZE,
+        max_attempts=settings.BOT_COMMANDS_MAX_ATTEMPTS,
+        retry_backoff=settings.BOT_COMMANDS_RETRY_BACKOFF_SECONDS,
+        retry_after=settings.BOT_COMMANDS_RETRY_AFTER_SECONDS,
+        drain_timeout=settings.BOT_COMMANDS_DRAIN_SECONDS,
+    )
+    service = ChatService(
+        chat_repo=get_chat_repo(),
+        message_repo=get_message_repo(),
+        chat_permissions_repo=get_chat_permissions_repo(),
+        connection_manager=get_connection_manager(),
+        ai_service=app.state.openai_service,
+        unsplash_service=app.state.unsplash_service,
+        bot_commands=bot_commands,
+    )
+    bot_commands.start(service.execute_bot_command, service.fail_bot_command)
+    app.state.bot_commands = bot_commands
+    return bot_commands
+
+
 ChatServiceDep = Annotated[BaseChatService, Depends(get_chat_service)]
 
-CurrentUserDep = Annotated[User, Depends(get_current_user)]
+CurrentUserDep = Annotated[UserPrincipal, Depends(get_current_user)]
 
 
 async def check_chat_member(
     chat_id: UUID, chat_repo: ChatRepositoryDep, current_user: CurrentUserDep
-) -> User:
+) -> UserPrincipal:
     chat = await chat_repo.get_chat(chat_id)
     if current_user.id not in chat.member_ids:
         raise HTTPException(
@@ -96,13 +151,20 @@ async def check_chat_member(
     return current_user
 
 
-ChatMemberDep = Annotated[User, Depends(check_chat_member)]
+ChatMemberDep = Annotated[UserPrincipal, Depends(check_chat_member)]
 
 
 async def check_websocket_chat_member(
-    chat_id: UUID, chat_repo: ChatRepositoryDep, current_user: CurrentWebsocketUserDep
-) -> User:
-    chat = await chat_repo.get_chat(chat_id)
+    websocket: WebSocket,
+    chat_id: UUID,
+    chat_repo: ChatRepositoryDep,
+    admission: HandshakeAdmissionDep,
+    session: AsyncSession = Depends(get_async_db),
+) -> UserPrincipal:
+    async with admission.admit():
+        current_user = await get_current_websocket_user(websocket, session)
+        chat = await chat_repo.get_chat(chat_id)
+
     if current_user.id not in chat.member_ids:
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION,
@@ -112,12 +174,12 @@ async def check_websocket_chat_member(
     return current_user
 
 
-WebsocketChatMemberDep = Annotated[User, Depends(check_websocket_chat_member)]
+WebsocketChatMemberDep = Annotated[UserPrincipal, Depends(check_websocket_chat_member)]
 
 
 async def check_chat_owner(
     chat_id: UUID, chat_repo: ChatRepositoryDep, current_user: CurrentUserDep
-) -> User:
+) -> UserPrincipal:
     chat = await chat_repo.get_chat(chat_id)
     if chat.is_group and current_user.id != chat.owner_id:
         raise HTTPException(
@@ -128,14 +190,14 @@ async def check_chat_owner(
     return current_user
 
 
-ChatOwnerDep = Annotated[User, Depends(check_chat_owner)]
+ChatOwnerDep = Annotated[UserPrincipal, Depends(check_chat_owner)]
 
 
 async def check_send_permission(
     chat_id: UUID,
     chat_permissions_repo: ChatPermissionsRepositoryDep,
     current_member: ChatMemberDep,
-) -> User:
+) -> UserPrincipal:
     permissions = await chat_permissions_repo.get_user_chat_permissions(
         chat_id=chat_id, user_id=current_member.id
     )
@@ -156,7 +218,7 @@ async def check_change_permission(
     user_id: int,
     chat_permissions_repo: ChatPermissionsRepositoryDep,
     current_member: ChatMemberDep,
-) -> User:
+) -> UserPrincipal:
     if user_id == current_member.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -184,7 +246,7 @@ async def check_remove_members_permission(
     chat_repo: ChatRepositoryDep,
     chat_permissions_repo: ChatPermissionsRepositoryDep,
     current_member: ChatMemberDep,
-) -> User:
+) -> UserPrincipal:
     if user_id == current_member.id:
         return current_member
 
@@ -215,7 +277,7 @@ async def check_delete_messages_permission(
     message_repo: MessageRepositoryDep,
     chat_permissions_repo: ChatPermissionsRepositoryDep,
     current_member: ChatMemberDep,
-) -> User:
+) -> UserPrincipal:
     message = await message_repo.get_message(message_id)
 
     if message.sender_id == current_member.id:
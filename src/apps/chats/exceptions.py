@@ -73,3 +73,22 @@ class IsNotChatPermissionsEntityException(WrongTypeException):
 class IsNotChatPermissionsModelException(WrongTypeException):
     def __init__(self, gotten_type: str):
         super().__init__(type(ChatPermissionsModel).__name__, gotten_type)
+
+
+@dataclass
+class HandshakeRejectedException(Exception):
+    reason: str
+    retry_after: float
+
+    @property
+    def message(self):
+        return f"WebSocket handshake rejected ({self.reason}), retry after {self.retry_after:.2f}s"
+
+
+@dataclass
+class BotCommandsBusyException(Exception):
+    retry_after: float
+
+    @property
+    def message(self):
+        return f"Too many bot commands in progress, retry after {self.retry_after:.0f}s"
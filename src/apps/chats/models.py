@@ -55,3 +55,21 @@ class ChatPermissionsModel(Document):
             "user_id",
             ("chat_id", "user_id"),
         ]
+
+
+class ChatSummaryModel(Document):
+    """Rolling summary of a chat; ``id`` is the chat's id."""
+
+    id: UUID
+    summary: str = ""
+    # Position of the last message folded into the summary.
+    summarized_until: datetime | None = None
+    last_message_id: UUID | None = None
+    # Messages added since; the refresh job picks chats by it.
+    pending_count: int = 0
+    locked_until: datetime | None = None
+    updated_at: datetime
+
+    class Settings:
+        name = "chat_summaries"
+        indexes = ["pending_count"]
@@ -1,24 +1,42 @@
 import logging
+import time
 from dataclasses import dataclass
 from uuid import UUID
 
 from fastapi import HTTPException, status
 
-from src.apps.ai.exceptions import OpenAIServiceException, UnsplashServiceException
+from src.apps.ai.exceptions import AIServiceException
 from src.apps.ai.services import OpenAIService, UnsplashService
+from src.apps.chats.commands import (
+    BOT_SENDER_ID,
+    BotCommand,
+    BotCommandKind,
+    BotCommandQueue,
+    parse_bot_command,
+)
 from src.apps.chats.entities import Chat, ChatPermissions, Message
 from src.apps.chats.schemas import Order, UpdateChatPermissionsSchema
 from src.apps.chats.services import BaseChatService
+from src.apps.chats.summaries import chat_summaries
 from src.apps.chats.websocket.connections import ConnectionManager
+from src.settings.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+def _bot_error_text(kind: BotCommandKind, error: Exception) -> str:
+    action = 'querying AI' if kind == BotCommandKind.AI else 'getting photo'
+    if isinstance(error, AIServiceException):
+        return f'Error while {action}: {error.detail}'
+    return f'Unexpected error while {action}: {str(error)}'
+
+
 @dataclass
 class ChatService(BaseChatService):
     connection_manager: ConnectionManager
     ai_service: OpenAIService
     unsplash_service: UnsplashService
+    bot_commands: BotCommandQueue
 
     async def create_private_chat(self, chat: Chat, other_user_id) -> None:
         logger.info("Creating private chat with id '%s'", chat.id)
@@ -107,12 +125,102 @@ class ChatService(BaseChatService):
         await self.chat_repo.delete_chat(chat_id)
         await self.message_repo.delete_chat_messages(chat_id)
         await self.chat_permissions_repo.delete_all_user_chat_permissions(chat_id)
+        await chat_summaries.forget(chat_id)
+
+    async def _post_bot_message(
+        self, message_id: UUID, chat_id: UUID, content: str
+    ) -> None:
+        message = Message(
+            id=message_id,
+            chat_id=chat_id,
+            sender_id=BOT_SENDER_ID,
+            content=content,
+        )
+        await self.message_repo.add_message(message)
+        await chat_summaries.note_message(chat_id)
+        await self.connection_manager.send_text_message(
+            message.chat_id,
+            message.id,
+            message.content,
+            message.sender_id,
+            message.chat_id,
+        )
+
+    async def _stream_ai_answer(self, command: BotCommand) -> str:
+        """
+        Broadcasts the answer as it is generated and returns the full text.
+        Deltas carry the id the persisted message will get, so clients can
+        replace the partial answer with the final text message. The chat's
+        summary and latest messages go along as context.
+        """
+        message_id, chat_id = command.reply_id, command.chat_id
+        flush_interval = settings.AI_STREAM_FLUSH_INTERVAL_MS / 1000
+        parts, pending = [], []
+        index, flushed_at = 0, float('-inf')
+
+        async def flush():
+            nonlocal index, flushed_at
+            await self.connection_manager.send_ai_message_delta(
+                key=chat_id,
+                message_id=message_id,
+                sender_id=BOT_SENDER_ID,
+                chat_id=chat_id,
+                index=index,
+                delta=''.join(pending),
+            )
+            index += 1
+            flushed_at = time.monotonic()
+            pending.clear()
+
+        context = await chat_summaries.build_context(
+            chat_id, exclude_id=command.message_id
+        )
+        try:
+            async for delta in self.ai_service.stream(command.argument, context):
+                parts.append(delta)
+                pending.append(delta)
+                if time.monotonic() - flushed_at >= flush_interval:
+                    await flush()
+            if pending:
+                await flush()
+            return ''.join(parts)
+        except Exception as e:
+            if not parts:
+                # Nothing shown yet, so the command can still be retried.
+                raise
+            error = _bot_error_text(BotCommandKind.AI, e)
+            logger.error(error)
+        # Keep whatever was already shown and explain why it stopped.
+        return '\n\n'.join([''.join(parts), error])
+
+    async def execute_bot_command(self, command: BotCommand) -> None:
+        logger.info(
+            "Executing '@%s' command in chat with id '%s'",
+            command.kind.value,
+            command.chat_id,
+        )
+        if command.kind == BotCommandKind.AI:
+            content = await self._stream_ai_answer(command)
+        else:
+            content = await self.unsplash_service.search_photo(command.argument)
+        await self._post_bot_message(command.reply_id, command.chat_id, content)
+
+    async def fail_bot_command(self, command: BotCommand, error: Exception) -> None:
+        content = _bot_error_text(command.kind, error)
+        logger.error(content)
+        await self._post_bot_message(command.reply_id, command.chat_id, content)
 
     async def create_message(self, message: Message) -> None:
         logger.info("Creating message to chat with id '%s'", message.chat_id)
         check_chat_exists = await self.get_chat(message.chat_id)
 
+        # Refuse before storing, so a rejected command can simply be resent.
+        command = parse_bot_command(message)
+        if command:
+            self.bot_commands.ensure_capacity(command)
+
         await self.message_repo.add_message(message)
+        await chat_summaries.note_message(message.chat_id)
 
         await self.connection_manager.send_text_message(
             key=message.chat_id,
@@ -122,58 +230,8 @@ class ChatService(BaseChatService):
             chat_id=message.chat_id,
         )
 
-        if '@ai ' in message.content.lower():
-            question = message.content[message.content.index('@ai') + 3 :].strip()
-
-            try:
-                answer = await self.ai_service.ask(question)
-            except OpenAIServiceException as e:
-                answer = f'Error while querying AI: {e.detail}'
-                logger.error(answer)
-            except Exception as e:
-                answer = f'Unexpected error while querying AI: {str(e)}'
-                logger.error(answer)
-
-            ai_message = Message(
-                chat_id=message.chat_id,
-                sender_id=777,
-                content=answer,
-            )
-
-            await self.message_repo.add_message(ai_message)
-            await self.connection_manager.send_text_message(
-                ai_message.chat_id,
-                ai_message.id,
-                ai_message.content,
-                ai_message.sender_id,
-                ai_message.chat_id,
-            )
-
-        elif '@photo ' in message.content.lower():
-            query = message.content[message.content.index('@photo') + 6 :].strip()
-            try:
-                photo_url = await self.unsplash_service.search_photo(query)
-            except UnsplashServiceException as e:
-                photo_url = f'Error while getting photo: {e.detail}'
-                logger.error(photo_url)
-            except Exception as e:
-                photo_url = f'Unexpected error while getting photo: {str(e)}'
-                logger.error(photo_url)
-
-            photo_message = Message(
-                chat_id=message.chat_id,
-                sender_id=777,
-                content=photo_url,
-            )
-
-            await self.message_repo.add_message(photo_message)
-            await self.connection_manager.send_text_message(
-                photo_message.chat_id,
-                photo_message.id,
-                photo_message.content,
-                photo_message.sender_id,
-                photo_message.chat_id,
-            )
+        if command:
+            self.bot_commands.submit(command)
 
     async def get_message(self, chat_id: UUID, message_id: UUID) -> Message:
         logger.info("Retrieving message with id '%s'", message_id)
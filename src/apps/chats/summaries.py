@@ -0,0 +1,260 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from beanie import UpdateResponse
+from beanie.operators import And, Inc, Or, Set
+from bson import Binary
+from pymongo.errors import PyMongoError
+
+from src.apps.ai.exceptions import AIServiceException
+from src.apps.ai.services import OpenAIService
+from src.apps.chats.commands import BOT_SENDER_ID
+from src.apps.chats.models import ChatSummaryModel, MessageModel
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in English text; close enough for budgeting without
+# shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    return text[: max(tokens, 0) * CHARS_PER_TOKEN]
+
+
+def _format(message: MessageModel, max_chars: int) -> str:
+    sender = (
+        'assistant'
+        if message.sender_id == BOT_SENDER_ID
+        else f'user {message.sender_id}'
+    )
+    return f'{sender}: {message.content[:max_chars]}'
+
+
+@dataclass
+class ChatSummaries:
+    """
+    Per-chat rolling summaries for AI context. Sending a message only bumps a
+    counter; a periodic job folds the new messages of busy (or long-waiting)
+    chats into their summaries in batches, one model call per chat.
+    """
+
+    min_new_messages: int
+    max_age: float
+    chats_per_run: int
+    batch_messages: int
+    input_tokens: int
+    summary_tokens: int
+    message_max_chars: int
+    lease: float
+    context_tokens: int
+    recent_messages: int
+
+    async def note_message(self, chat_id: UUID) -> None:
+        # A native upsert: Beanie's upsert() is an update followed by an
+        # insert, which races when two first messages of a chat arrive at
+        # once. Summaries are best effort, so a database error here never
+        # fails the send.
+        try:
+            await ChatSummaryModel.get_motor_collection().update_one(
+                {"_id": Binary.from_uuid(chat_id)},
+                {
+                    "$inc": {"pending_count": 1},
+                    "$setOnInsert": {"updated_at": datetime.now(timezone.utc)},
+                },
+                upsert=True,
+            )
+        except PyMongoError:
+            logger.exception(
+                "Counting a message for the summary of chat with id '%s' failed",
+                chat_id,
+            )
+
+    async def forget(self, chat_id: UUID) -> None:
+        await ChatSummaryModel.find_one(ChatSummaryModel.id == chat_id).delete()
+
+    async def _claim(self, chat_id: UUID) -> ChatSummaryModel | None:
+        # A lease, so API workers running the same job skip each other's chats.
+        now = datetime.now(timezone.utc)
+        return await ChatSummaryModel.find_one(
+            ChatSummaryModel.id == chat_id,
+            Or(
+                ChatSummaryModel.locked_until == None,
+                ChatSummaryModel.locked_until < now,
+            ),
+        ).update(
+            Set({ChatSummaryModel.locked_until: now + timedelta(seconds=self.lease)}),
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+
+    async def _new_messages(self, summary: ChatSummaryModel) -> list[MessageModel]:
+        query = MessageModel.find(MessageModel.chat_id == summary.id)
+        if summary.summarized_until is None:
+            # A new (or rebuilt) summary starts from the latest messages, not
+            # from the start of the chat.
+            latest = (
+                await query.sort('-created_at', '-_id')
+                .limit(self.batch_messages)
+                .to_list()
+            )
+            return latest[::-1]
+        query = query.find(
+            Or(
+                MessageModel.created_at > summary.summarized_until,
+                And(
+                    MessageModel.created_at == summary.summarized_until,
+                    MessageModel.id > summary.last_message_id,
+                ),
+            )
+        )
+        return (
+            await query.sort('+created_at', '+_id').limit(self.batch_messages).to_list()
+        )
+
+    async def _fold(self, ai_service: OpenAIService, summary: ChatSummaryModel):
+        messages = await self._new_messages(summary)
+
+        # Fill the input budget from the oldest new message on, or from the
+        # newest when starting over, so that a first fold keeps the latest.
+        starting = summary.summarized_until is None
+        folded, lines, used = [], [], 0
+        for message in reversed(messages) if starting else messages:
+            line = _format(message, self.message_max_chars)
+            used += estimate_tokens(line)
+            if lines and used > self.input_tokens:
+                break
+            folded.append(message)
+            lines.append(line)
+        if starting:
+            folded.reverse()
+            lines.reverse()
+
+        update = {
+            ChatSummaryModel.locked_until: None,
+            ChatSummaryModel.updated_at: datetime.now(timezone.utc),
+        }
+        if folded:
+            text = await ai_service.summarize(
+                summary.summary, '\n'.join(lines), self.summary_tokens
+            )
+            update |= {
+                ChatSummaryModel.summary: truncate_to_tokens(text, self.summary_tokens),
+                ChatSummaryModel.summarized_until: folded[-1].created_at,
+                ChatSummaryModel.last_message_id: folded[-1].id,
+            }
+            # Decrement rather than reset, so messages sent meanwhile stay
+            # pending.
+            changes = [Set(update), Inc({ChatSummaryModel.pending_count: -len(folded)})]
+        else:
+            # Nothing to fold: the counter drifted (e.g. messages were deleted).
+            changes = [Set(update | {ChatSummaryModel.pending_count: 0})]
+        await ChatSummaryModel.find_one(ChatSummaryModel.id == summary.id).update(
+            *changes
+        )
+        if folded:
+            # The counter only approximates what is unsummarized (a first fold
+            # takes in messages sent before the summary existed); never let it
+            # go below zero, or the chat would wait that much longer.
+            await ChatSummaryModel.find_one(
+                ChatSummaryModel.id == summary.id, ChatSummaryModel.pending_count < 0
+            ).update(Set({ChatSummaryModel.pending_count: 0}))
+        metrics.counter('chat_summary_messages_folded_total').inc(len(folded))
+
+    async def refresh(self, ai_service: OpenAIService) -> None:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+        candidates = (
+            await ChatSummaryModel.find(
+                Or(
+                    ChatSummaryModel.pending_count >= self.min_new_messages,
+                    And(
+                        ChatSummaryModel.pending_count > 0,
+                        ChatSummaryModel.updated_at < stale_before,
+                    ),
+                )
+            )
+            .sort('-pending_count')
+            .limit(self.chats_per_run)
+            .to_list()
+        )
+
+        for candidate in candidates:
+            summary = await self._claim(candidate.id)
+            if summary is None:
+                continue
+            started_at = time.perf_counter()
+            try:
+                await self._fold(ai_service, summary)
+            except AIServiceException as e:
+                # The lease expires and the chat is picked up again later.
+                logger.warning(
+                    "Summarizing chat with id '%s' failed: %s", summary.id, e.detail
+                )
+                metrics.counter('chat_summary_refresh_total', result='error').inc()
+                continue
+            metrics.counter('chat_summary_refresh_total', result='ok').inc()
+            metrics.histogram('chat_summary_refresh_seconds').observe(
+                time.perf_counter() - started_at
+            )
+
+    async def build_context(self, chat_id: UUID, exclude_id: UUID | None = None) -> str:
+        """
+        The chat's summary followed by its latest messages, newest kept
+        first, within `context_tokens` in total.
+        """
+        summary = await ChatSummaryModel.find_one(ChatSummaryModel.id == chat_id)
+        recent = (
+            await MessageModel.find(
+                MessageModel.chat_id == chat_id, MessageModel.id != exclude_id
+            )
+            .sort('-created_at', '-_id')
+            .limit(self.recent_messages)
+            .to_list()
+        )
+
+        parts, budget = [], self.context_tokens
+        if summary and summary.summary:
+            text = truncate_to_tokens(
+                f'Summary: {summary.summary}', min(self.summary_tokens, budget)
+            )
+            parts.append(text)
+            budget -= estimate_tokens(text)
+
+        lines = []
+        for message in recent:
+            line = _format(message, self.message_max_chars)
+            if estimate_tokens(line) > budget:
+                break
+            lines.append(line)
+            budget -= estimate_tokens(line)
+        if lines:
+            parts.append('Latest messages:\n' + '\n'.join(reversed(lines)))
+
+        context = '\n\n'.join(parts)
+        metrics.histogram(
+            'ai_context_tokens', buckets=(0, 100, 250, 500, 1000, 2000, 4000)
+        ).observe(estimate_tokens(context))
+        return context
+
+
+chat_summaries = ChatSummaries(
+    min_new_messages=settings.CHAT_SUMMARY_MIN_NEW_MESSAGES,
+    max_age=settings.CHAT_SUMMARY_MAX_AGE_SECONDS,
+    chats_per_run=settings.CHAT_SUMMARY_CHATS_PER_RUN,
+    batch_messages=settings.CHAT_SUMMARY_BATCH_MESSAGES,
+    input_tokens=settings.CHAT_SUMMARY_INPUT_TOKENS,
+    summary_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+    message_max_chars=settings.CHAT_SUMMARY_MESSAGE_MAX_CHARS,
+    lease=settings.CHAT_SUMMARY_LEASE_SECONDS,
+    context_tokens=settings.AI_CONTEXT_TOKEN_BUDGET,
+    recent_messages=settings.AI_CONTEXT_RECENT_MESSAGES,
+)
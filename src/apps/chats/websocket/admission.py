@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from src.apps.chats.exceptions import HandshakeRejectedException
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HandshakeAdmission:
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float
+    retry_after: float
+    retry_jitter: float
+    _semaphore: asyncio.Semaphore = field(init=False, repr=False)
+    _waiting: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @asynccontextmanager
+    async def admit(self):
+        started_at = time.perf_counter()
+
+        if self._waiting >= self.max_queue:
+            self._reject('queue_full')
+
+        self._waiting += 1
+        metrics.gauge('ws_handshake_waiting').inc()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            self._reject('queue_timeout')
+        finally:
+            self._waiting -= 1
+            metrics.gauge('ws_handshake_waiting').dec()
+
+        metrics.counter('ws_handshake_admitted_total').inc()
+        metrics.histogram('ws_handshake_queue_seconds').observe(
+            time.perf_counter() - started_at
+        )
+        metrics.gauge('ws_handshake_in_progress').inc()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+            metrics.gauge('ws_handshake_in_progress').dec()
+            metrics.histogram('ws_handshake_seconds').observe(
+                time.perf_counter() - started_at
+            )
+
+    def _reject(self, reason: str):
+        retry_after = self.retry_after + random.uniform(0, self.retry_jitter)
+        metrics.counter('ws_handshake_rejected_total', reason=reason).inc()
+        logger.warning(
+            "Rejecting WebSocket handshake (%s), retry after %.2fs", reason, retry_after
+        )
+        raise HandshakeRejectedException(reason=reason, retry_after=retry_after)
@@ -7,6 +7,7 @@ from uuid import UUID
 from fastapi import WebSocket
 
 from src.apps.chats.websocket.schemas import (
+    AIMessageDeltaData,
     ErrorData,
     MessageReadData,
     TextMessageData,
@@ -72,6 +73,28 @@ class ConnectionManager(metaclass=SingletonMeta):
         )
         await self.send_message(key, message)
 
+    async def send_ai_message_delta(
+        self,
+        key: UUID,
+        message_id: UUID,
+        sender_id: int,
+        chat_id: UUID,
+        index: int,
+        delta: str,
+    ):
+        logger.debug("Sending AI message delta to all connections for key: %s", key)
+        message = WebSocketMessage(
+            type=WebSocketMessageType.AI_MESSAGE_DELTA,
+            data=AIMessageDeltaData(
+                message_id=message_id,
+                chat_id=chat_id,
+                sender_id=sender_id,
+                index=index,
+                delta=delta,
+            ).model_dump(),
+        )
+        await self.send_message(key, message)
+
     async def send_message_read(self, key: UUID, message_id: UUID, user_id: int):
         logger.info(
             "Sending message read notification to all connections for key: %s", key
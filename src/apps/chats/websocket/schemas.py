@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 class WebSocketMessageType(str, Enum):
     TEXT_MESSAGE = "text_message"
+    AI_MESSAGE_DELTA = "ai_message_delta"
     MESSAGE_READ = "message_read"
     TYPING_INDICATOR = "typing_indicator"
     USER_JOINED = "user_joined"
@@ -27,6 +28,16 @@ class TextMessageData(BaseModel):
     created_at: str
 
 
+class AIMessageDeltaData(BaseModel):
+    """A chunk of an AI answer; the complete answer follows as a text message."""
+
+    message_id: UUID
+    chat_id: UUID
+    sender_id: int
+    index: int
+    delta: str
+
+
 class MessageReadData(BaseModel):
     message_id: UUID
     user_id: int
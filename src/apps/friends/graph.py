@@ -0,0 +1,88 @@
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.friends.models import FriendRequest, FriendRequestStatus, Friendship
+from src.apps.users.models import User
+
+
+async def add_friendship(session: AsyncSession, user_id: int, friend_id: int) -> None:
+    await session.execute(
+        insert(Friendship)
+        .values(
+            [
+                {"user_id": user_id, "friend_id": friend_id},
+                {"user_id": friend_id, "friend_id": user_id},
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+async def remove_friendship(
+    session: AsyncSession, user_id: int, friend_id: int
+) -> None:
+    await session.execute(
+        delete(Friendship).where(
+            Friendship.user_id.in_([user_id, friend_id]),
+            Friendship.friend_id.in_([user_id, friend_id]),
+        )
+    )
+
+
+async def are_friends(session: AsyncSession, user_id: int, friend_id: int) -> bool:
+    return await session.get(Friendship, (user_id, friend_id)) is not None
+
+
+async def count_friends(session: AsyncSession, user_id: int) -> int:
+    return await session.scalar(
+        select(func.count())
+        .select_from(Friendship)
+        .join(User, User.id == Friendship.friend_id)
+        .where(Friendship.user_id == user_id, User.is_active == True)
+    )
+
+
+async def upsert_friend_request(
+    session: AsyncSession, from_user_id: int, to_user_id: int
+) -> FriendRequest | None:
+    """
+    Create a pending request, or revive a declined one for the same pair.
+    Returns None when the pair already has a pending or accepted request.
+    """
+    stmt = insert(FriendRequest).values(
+        from_user_id=from_user_id,
+        to_user_id=to_user_id,
+        status=FriendRequestStatus.pending,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            func.least(FriendRequest.from_user_id, FriendRequest.to_user_id),
+            func.greatest(FriendRequest.from_user_id, FriendRequest.to_user_id),
+        ],
+        set_={
+            "from_user_id": stmt.excluded.from_user_id,
+            "to_user_id": stmt.excluded.to_user_id,
+            "status": FriendRequestStatus.pending,
+            "created_at": func.now(),
+            "updated_at": func.now(),
+        },
+        where=FriendRequest.status == FriendRequestStatus.declined,
+    )
+    return await session.scalar(
+        stmt.returning(FriendRequest).execution_options(populate_existing=True)
+    )
+
+
+async def get_pair_request(
+    session: AsyncSession, user_id: int, other_user_id: int
+) -> FriendRequest | None:
+    # Served by the least/greatest unique index.
+    return await session.scalar(
+        select(FriendRequest).where(
+            func.least(FriendRequest.from_user_id, FriendRequest.to_user_id)
+            == min(user_id, other_user_id),
+            func.greatest(FriendRequest.from_user_id, FriendRequest.to_user_id)
+            == max(user_id, other_user_id),
+        )
+    )
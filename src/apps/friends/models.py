@@ -1,6 +1,7 @@
 import enum
+from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, func
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.databases import Base
@@ -14,7 +15,28 @@ class FriendRequestStatus(str, enum.Enum):
 
 class FriendRequest(Base):
     __tablename__ = "friend_requests"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # One request per pair of users, whichever way it was sent
+        Index(
+            "uq_friend_requests_pair",
+            text("least(from_user_id, to_user_id)"),
+            text("greatest(from_user_id, to_user_id)"),
+            unique=True,
+        ),
+        Index(
+            "ix_friend_requests_to_user_id_status_created_at",
+            "to_user_id",
+            "status",
+            "created_at",
+        ),
+        Index(
+            "ix_friend_requests_from_user_id_status_created_at",
+            "from_user_id",
+            "status",
+            "created_at",
+        ),
+        {"extend_existing": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     from_user_id: Mapped[int] = mapped_column(
@@ -43,3 +65,20 @@ class FriendRequest(Base):
     to_user = relationship(
         "User", foreign_keys=[to_user_id], back_populates="received_friend_requests"
     )
+
+
+class Friendship(Base):
+    """Accepted friendship, stored once per direction (a->b and b->a)."""
+
+    __tablename__ = "friendships"
+    __table_args__ = (Index("ix_friendships_friend_id", "friend_id"),)
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    friend_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -1,17 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import and_, or_, select
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.apps.friends.models import FriendRequest
+from src.apps.friends.graph import (
+    add_friendship,
+    are_friends,
+    count_friends,
+    get_pair_request,
+    remove_friendship,
+    upsert_friend_request,
+)
+from src.apps.friends.models import FriendRequest, Friendship
 from src.apps.friends.schemas import (
+    FriendPage,
     FriendRequestCreate,
     FriendRequestOut,
+    FriendRequestPage,
     FriendRequestStatus,
+    FriendSuggestionOut,
 )
+from src.apps.friends.suggestions import friend_suggestions
+from src.apps.posts.timeline import backfill_timelines, remove_from_timelines
+from src.apps.users.dependencies import UserLoaderDep
+from src.apps.users.loaders import UserLoader
 from src.apps.users.models import User
 from src.apps.users.routers.auth import get_current_user
-from src.apps.users.schemas import UserOut
+from src.apps.users.schemas import UserOut, UserPrincipal
+from src.apps.users.search import user_out_columns
 from src.databases import get_async_db
+from src.pagination import decode_cursor, keyset_page, split_page
+from src.settings.config import settings
 
 friend_router = APIRouter()
 
@@ -21,7 +42,7 @@ friend_router = APIRouter()
 )
 async def send_friend_request(
     data: FriendRequestCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_db),
 ):
     if data.to_username == current_user.username:
@@ -35,42 +56,105 @@ async def send_friend_request(
     if not to_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user_query = select(FriendRequest).where(
-        or_(
-            and_(
-                FriendRequest.from_user_id == current_user.id,
-                FriendRequest.to_user_id == to_user.id,
-            ),
-            and_(
-                FriendRequest.from_user_id == to_user.id,
-                FriendRequest.to_user_id == current_user.id,
-            ),
-        )
-    )
-    existing = (await session.execute(user_query)).scalars().first()
-    if existing:
-        if existing.status == FriendRequestStatus.pending:
-            raise HTTPException(
-                status_code=400, detail="Friend request already pending"
-            )
-        elif existing.status == FriendRequestStatus.accepted:
+    if await are_friends(session, current_user.id, to_user.id):
+        raise HTTPException(status_code=400, detail="You are already friends")
+
+    friend_request = await upsert_friend_request(session, current_user.id, to_user.id)
+    if not friend_request:
+        existing = await get_pair_request(session, current_user.id, to_user.id)
+        if existing and existing.status == FriendRequestStatus.accepted:
             raise HTTPException(status_code=400, detail="You are already friends")
+        raise HTTPException(status_code=400, detail="Friend request already pending")
 
-    friend_request = FriendRequest(
-        from_user_id=current_user.id,
-        to_user_id=to_user.id,
-        status=FriendRequestStatus.pending,
-    )
-    session.add(friend_request)
     await session.commit()
     await session.refresh(friend_request)
     return friend_request
 
 
+async def _pending_requests_page(
+    session: AsyncSession,
+    loader: UserLoader,
+    owner_column,
+    other_column,
+    user_id: int,
+    cursor: str | None,
+    limit: int,
+) -> FriendRequestPage:
+    pending = (owner_column == user_id) & (
+        FriendRequest.status == FriendRequestStatus.pending
+    )
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    query = keyset_page(
+        select(FriendRequest).where(pending),
+        (FriendRequest.created_at, FriendRequest.id),
+        after,
+        limit,
+    )
+    requests = (await session.scalars(query)).all()
+    requests, next_cursor = split_page(
+        requests, limit, lambda request: (request.created_at, request.id)
+    )
+    pending_count = await session.scalar(
+        select(func.count()).select_from(FriendRequest).where(pending)
+    )
+
+    users = await loader.load_many(
+        getattr(request, other_column.key) for request in requests
+    )
+    return FriendRequestPage(
+        items=[
+            FriendRequestOut.model_validate(request).model_copy(
+                update={"user": user and UserOut.model_validate(user)}
+            )
+            for request, user in zip(requests, users)
+        ],
+        next_cursor=next_cursor,
+        pending_count=pending_count,
+    )
+
+
+@friend_router.get("/requests/incoming", response_model=FriendRequestPage)
+async def get_incoming_requests(
+    loader: UserLoaderDep,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_db),
+):
+    return await _pending_requests_page(
+        session,
+        loader,
+        FriendRequest.to_user_id,
+        FriendRequest.from_user_id,
+        current_user.id,
+        cursor,
+        limit,
+    )
+
+
+@friend_router.get("/requests/outgoing", response_model=FriendRequestPage)
+async def get_outgoing_requests(
+    loader: UserLoaderDep,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_db),
+):
+    return await _pending_requests_page(
+        session,
+        loader,
+        FriendRequest.from_user_id,
+        FriendRequest.to_user_id,
+        current_user.id,
+        cursor,
+        limit,
+    )
+
+
 @friend_router.post("/requests/{request_id}/accept", response_model=FriendRequestOut)
 async def accept_friend_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_db),
 ):
     friend_request = await session.get(FriendRequest, request_id)
@@ -81,7 +165,12 @@ async def accept_friend_request(
         raise HTTPException(status_code=400, detail="Friend request is not pending")
 
     friend_request.status = FriendRequestStatus.accepted
+    from_user_id, to_user_id = friend_request.from_user_id, friend_request.to_user_id
+    await add_friendship(session, from_user_id, to_user_id)
+    await backfill_timelines(session, from_user_id, to_user_id)
     await session.commit()
+    # Only once committed, so a failed commit leaves the graph untouched.
+    friend_suggestions.add_friendship(from_user_id, to_user_id)
     await session.refresh(friend_request)
     return friend_request
 
@@ -89,7 +178,7 @@ async def accept_friend_request(
 @friend_router.post("/requests/{request_id}/decline", response_model=FriendRequestOut)
 async def reject_friend_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_db),
 ):
     friend_request = await session.get(FriendRequest, request_id)
@@ -108,7 +197,7 @@ async def reject_friend_request(
 @friend_router.delete("/requests/{request_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_friend_request(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_db),
 ):
     friend_request = await session.get(FriendRequest, request_id)
@@ -120,37 +209,57 @@ async def delete_friend_request(
             status_code=403, detail="Not allowed to delete this friend request"
         )
 
+    was_accepted = friend_request.status == FriendRequestStatus.accepted
+    from_user_id, to_user_id = friend_request.from_user_id, friend_request.to_user_id
+    if was_accepted:
+        await remove_friendship(session, from_user_id, to_user_id)
+        await remove_from_timelines(session, from_user_id, to_user_id)
     await session.delete(friend_request)
     await session.commit()
+    if was_accepted:
+        friend_suggestions.remove_friendship(from_user_id, to_user_id)
 
 
-@friend_router.get("/", response_model=list[UserOut])
+@friend_router.get("/", response_model=FriendPage)
 async def get_friends(
-    current_user: User = Depends(get_current_user),
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_db),
 ):
-    user_query = select(FriendRequest).where(
-        or_(
-            FriendRequest.from_user_id == current_user.id,
-            FriendRequest.to_user_id == current_user.id,
-        ),
-        FriendRequest.status == FriendRequestStatus.accepted,
+    query = (
+        select(*user_out_columns)
+        .join(Friendship, Friendship.friend_id == User.id)
+        .where(
+            Friendship.user_id == current_user.id,
+            Friendship.friend_id > after_id,
+            User.is_active == True,
+        )
+        .order_by(Friendship.friend_id)
+        .limit(limit)
     )
+    rows = (await session.execute(query)).mappings().all()
+    return {
+        "items": rows,
+        "next_cursor": rows[-1]["id"] if len(rows) == limit else None,
+        "count": await count_friends(session, current_user.id),
+    }
 
-    results = await session.execute(user_query)
-    friend_requests = results.scalars().all()
 
-    friend_ids = []
-    for fr in friend_requests:
-        friend_id = (
-            fr.to_user_id if fr.from_user_id == current_user.id else fr.from_user_id
+@friend_router.get("/suggestions", response_model=list[FriendSuggestionOut])
+async def get_friend_suggestions(
+    loader: UserLoaderDep,
+    limit: int = Query(20, ge=1, le=settings.FRIEND_SUGGESTIONS_LIMIT),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    suggestions = await friend_suggestions.get(current_user.id, limit)
+    users = await loader.load_many(suggestion.user_id for suggestion in suggestions)
+    return [
+        FriendSuggestionOut(
+            user=UserOut.model_validate(user),
+            mutual_friends=suggestion.mutual_friends,
+            shared_chats=suggestion.shared_chats,
         )
-        friend_ids.append(friend_id)
-
-    if not friend_ids:
-        return []
-
-    user_query = select(User).where(User.id.in_(friend_ids))
-    friends_result = await session.execute(user_query)
-    friends = friends_result.scalars().all()
-    return friends
+        for suggestion, user in zip(suggestions, users)
+        if user
+    ]
@@ -1,6 +1,10 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel
 
 from src.apps.friends.models import FriendRequestStatus
+from src.apps.users.schemas import UserOut
 
 
 class FriendRequestCreate(BaseModel):
@@ -12,5 +16,26 @@ class FriendRequestOut(BaseModel):
     from_user_id: int
     to_user_id: int
     status: FriendRequestStatus
+    created_at: datetime
+    # The other side of the request, filled in by the inbox/outbox listings
+    user: Optional[UserOut] = None
 
     model_config = {"from_attributes": True}
+
+
+class FriendPage(BaseModel):
+    items: list[UserOut]
+    next_cursor: Optional[int]
+    count: int
+
+
+class FriendSuggestionOut(BaseModel):
+    user: UserOut
+    mutual_friends: int
+    shared_chats: int
+
+
+class FriendRequestPage(BaseModel):
+    items: list[FriendRequestOut]
+    next_cursor: Optional[str]
+    pending_count: int
@@ -0,0 +1,254 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from beanie.operators import In
+from pydantic import BaseModel
+from sqlalchemy import or_, select
+
+from src.apps.chats.models import ChatModel
+from src.apps.friends.models import FriendRequest, FriendRequestStatus, Friendship
+from src.cache import TTLCache
+from src.databases import session_factory
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BATCH_SIZE = 10_000
+COMPUTE_BATCH_SIZE = 500
+MAX_CHATS_PER_USER = 500
+
+
+class _ChatMembers(BaseModel):
+    member_ids: list[int]
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    user_id: int
+    mutual_friends: int
+    shared_chats: int
+
+
+@dataclass
+class FriendSuggestions:
+    """
+    Friend-of-friend suggestions over an in-memory snapshot of the friendship
+    graph. The snapshot is reloaded periodically; this worker's own friendship
+    changes are applied to it right away, other workers' on the next reload.
+    """
+
+    budget: float
+    limit: int
+    chat_weight: float
+    cache_ttl: float
+    cache_max_size: int
+    _adjacency: dict[int, frozenset[int]] = field(default_factory=dict, init=False)
+    _cache: TTLCache[int, list[Suggestion]] = field(init=False, repr=False)
+    _computing: dict[int, asyncio.Task] = field(default_factory=dict, init=False)
+    # Bumped on every friendship change of a user, so computations that
+    # started before it don't cache stale results. At most one entry per user
+    # in the graph.
+    _versions: Counter = field(default_factory=Counter, init=False, repr=False)
+    # Changes applied while a reload streams the graph; the stream may predate
+    # them, so they are replayed onto the new snapshot before it is swapped in.
+    _changes_since_reload: list[tuple[int, int, bool]] | None = field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        self._cache = TTLCache(ttl=self.cache_ttl, max_size=self.cache_max_size)
+
+    async def load_snapshot(self) -> None:
+        started_at = time.perf_counter()
+        adjacency = defaultdict(list)
+        self._changes_since_reload = changes = []
+        try:
+            async with session_factory() as session:
+                result = await session.stream(
+                    select(Friendship.user_id, Friendship.friend_id).execution_options(
+                        yield_per=SNAPSHOT_BATCH_SIZE
+                    )
+                )
+                async for rows in result.partitions():
+                    for user_id, friend_id in rows:
+                        adjacency[user_id].append(friend_id)
+        finally:
+            self._changes_since_reload = None
+
+        snapshot = {
+            user_id: frozenset(friends) for user_id, friends in adjacency.items()
+        }
+        for user_id, friend_id, added in changes:
+            self._apply(snapshot, user_id, friend_id, added)
+        self._adjacency = snapshot
+        for user_id, friend_id, _ in changes:
+            self._invalidate(user_id)
+            self._invalidate(friend_id)
+        metrics.gauge("friend_graph_users").set(len(self._adjacency))
+        logger.info(
+            "Loaded friendship graph of %s users in %.2fs",
+            len(self._adjacency),
+            time.perf_counter() - started_at,
+        )
+
+    async def refresh(self) -> None:
+        """Reload the snapshot and recompute suggestions of recently active users."""
+        await self.load_snapshot()
+        user_ids = self._cache.keys()
+        for start in range(0, len(user_ids), COMPUTE_BATCH_SIZE):
+            await self._compute_many(user_ids[start : start + COMPUTE_BATCH_SIZE])
+
+    def _invalidate(self, user_id: int) -> None:
+        self._versions[user_id] += 1
+        self._cache.invalidate(user_id)
+
+    @staticmethod
+    def _apply(
+        adjacency: dict[int, frozenset[int]], user_id: int, friend_id: int, added: bool
+    ) -> None:
+        for a, b in ((user_id, friend_id), (friend_id, user_id)):
+            friends = adjacency.get(a, frozenset())
+            adjacency[a] = friends | {b} if added else friends - {b}
+
+    def _change(self, user_id: int, friend_id: int, added: bool) -> None:
+        self._apply(self._adjacency, user_id, friend_id, added)
+        if self._changes_since_reload is not None:
+            self._changes_since_reload.append((user_id, friend_id, added))
+        self._invalidate(user_id)
+        self._invalidate(friend_id)
+
+    def add_friendship(self, user_id: int, friend_id: int) -> None:
+        """Apply a committed friendship to the snapshot."""
+        self._change(user_id, friend_id, added=True)
+
+    def remove_friendship(self, user_id: int, friend_id: int) -> None:
+        """Apply a committed unfriending to the snapshot."""
+        self._change(user_id, friend_id, added=False)
+
+    async def _pending_requests(self, user_ids: list[int]) -> dict[int, set[int]]:
+        pending = defaultdict(set)
+        async with session_factory() as session:
+            result = await session.execute(
+                select(FriendRequest.from_user_id, FriendRequest.to_user_id).where(
+                    or_(
+                        FriendRequest.from_user_id.in_(user_ids),
+                        FriendRequest.to_user_id.in_(user_ids),
+                    ),
+                    FriendRequest.status == FriendRequestStatus.pending,
+                )
+            )
+            for from_user_id, to_user_id in result:
+                pending[from_user_id].add(to_user_id)
+                pending[to_user_id].add(from_user_id)
+        return pending
+
+    async def _chat_co_members(self, user_ids: list[int]) -> dict[int, Counter]:
+        co_members = defaultdict(Counter)
+        if not self.chat_weight:
+            return co_members
+        chats = (
+            await ChatModel.find(In(ChatModel.member_ids, user_ids))
+            .limit(MAX_CHATS_PER_USER * len(user_ids))
+            .project(_ChatMembers)
+            .to_list()
+        )
+        wanted = set(user_ids)
+        for chat in chats:
+            for user_id in wanted.intersection(chat.member_ids):
+                co_members[user_id].update(chat.member_ids)
+        return co_members
+
+    def _rank(
+        self, user_id: int, excluded: set[int], shared_chats: Counter
+    ) -> list[Suggestion]:
+        friends = self._adjacency.get(user_id, frozenset())
+        mutual = Counter()
+        for friend_id in friends:
+            mutual.update(self._adjacency.get(friend_id, ()))
+
+        candidates = (mutual.keys() | shared_chats.keys()) - friends - excluded
+        candidates.discard(user_id)
+        top = heapq.nlargest(
+            self.limit,
+            candidates,
+            key=lambda candidate: (
+                mutual[candidate] + self.chat_weight * shared_chats[candidate],
+                -candidate,
+            ),
+        )
+        return [
+            Suggestion(
+                user_id=candidate,
+                mutual_friends=mutual[candidate],
+                shared_chats=shared_chats[candidate],
+            )
+            for candidate in top
+        ]
+
+    async def _compute_many(self, user_ids: list[int]) -> dict[int, list[Suggestion]]:
+        versions = {user_id: self._versions[user_id] for user_id in user_ids}
+        pending, co_members = await asyncio.gather(
+            self._pending_requests(user_ids), self._chat_co_members(user_ids)
+        )
+        # Set operations over big neighbourhoods are CPU-bound: keep them off
+        # the event loop.
+        suggestions = await asyncio.to_thread(
+            lambda: {
+                user_id: self._rank(user_id, pending[user_id], co_members[user_id])
+                for user_id in user_ids
+            }
+        )
+        for user_id, user_suggestions in suggestions.items():
+            # A friendship of this user changed meanwhile: return the result
+            # but leave the cache for the next request to fill.
+            if self._versions[user_id] == versions[user_id]:
+                self._cache.set(user_id, user_suggestions)
+        return suggestions
+
+    async def _compute(self, user_id: int) -> list[Suggestion]:
+        return (await self._compute_many([user_id]))[user_id]
+
+    def _forget(self, user_id: int, task: asyncio.Task) -> None:
+        self._computing.pop(user_id, None)
+        if not task.cancelled() and task.exception():
+            logger.error(
+                "Computing friend suggestions for user with id '%s' failed",
+                user_id,
+                exc_info=task.exception(),
+            )
+
+    async def get(self, user_id: int, limit: int) -> list[Suggestion]:
+        suggestions = self._cache.get(user_id)
+        if suggestions is not None:
+            metrics.counter("friend_suggestions_total", result="hit").inc()
+            return suggestions[:limit]
+
+        task = self._computing.get(user_id)
+        if task is None:
+            task = self._computing[user_id] = asyncio.create_task(
+                self._compute(user_id)
+            )
+            task.add_done_callback(lambda task: self._forget(user_id, task))
+        try:
+            # Shielded: on timeout the computation still completes and fills
+            # the cache for the next request.
+            suggestions = await asyncio.wait_for(asyncio.shield(task), self.budget)
+        except asyncio.TimeoutError:
+            metrics.counter("friend_suggestions_total", result="timeout").inc()
+            return []
+        metrics.counter("friend_suggestions_total", result="miss").inc()
+        return suggestions[:limit]
+
+
+friend_suggestions = FriendSuggestions(
+    budget=settings.FRIEND_SUGGESTIONS_BUDGET_MS / 1000,
+    limit=settings.FRIEND_SUGGESTIONS_LIMIT,
+    chat_weight=settings.FRIEND_SUGGESTIONS_CHAT_WEIGHT,
+    cache_ttl=settings.FRIEND_SUGGESTIONS_CACHE_TTL_SECONDS,
+    cache_max_size=settings.FRIEND_SUGGESTIONS_CACHE_MAX_SIZE,
+)
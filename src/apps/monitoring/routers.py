@@ -0,0 +1,15 @@
+from fastapi import APIRouter, status
+
+from src.metrics import metrics
+
+monitoring_router = APIRouter()
+
+
+@monitoring_router.get(
+    '/metrics',
+    summary='Process metrics',
+    description='Returns counters, gauges and latency histograms of this worker',
+    status_code=status.HTTP_200_OK,
+)
+async def get_metrics() -> dict[str, list[dict]]:
+    return metrics.snapshot()
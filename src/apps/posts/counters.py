@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.apps.posts.models import CommentModel, LikeModel, PostModel
+from src.databases import engine, session_factory
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary, but unique among the app's advisory locks.
+RECONCILE_LOCK_ID = 0x706F7374
+
+# Counter updates must not touch updated_at (its onupdate would fire otherwise).
+_KEEP_UPDATED_AT = {PostModel.updated_at: PostModel.updated_at}
+
+
+async def change_count(
+    session: AsyncSession, post_id: int, column: InstrumentedAttribute, delta: int
+) -> bool:
+    """Atomically add `delta` to a post counter; False if the post does not exist."""
+    result = await session.execute(
+        update(PostModel)
+        .where(PostModel.id == post_id)
+        .values({column: column + delta, **_KEEP_UPDATED_AT})
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
+
+
+async def decrement_counts(
+    session: AsyncSession, column: InstrumentedAttribute, post_ids: Iterable[int]
+) -> None:
+    # One UPDATE per distinct decrement rather than one per post.
+    by_delta = defaultdict(list)
+    for post_id, count in Counter(post_ids).items():
+        by_delta[count].append(post_id)
+    for count, ids in by_delta.items():
+        await session.execute(
+            update(PostModel)
+            .where(PostModel.id.in_(ids))
+            .values({column: column - count, **_KEEP_UPDATED_AT})
+            .execution_options(synchronize_session=False)
+        )
+
+
+@dataclass
+class PostCounterReconciler:
+    """
+    Recomputes like/comment counters in id-ordered batches and fixes drift
+    (e.g. from rows removed by FK cascades, which bypass the counters).
+    """
+
+    batch_size: int
+    batch_pause: float
+    interval: float
+
+    async def _reconcile_batch(
+        self, session: AsyncSession, after_id: int
+    ) -> int | None:
+        # Lock the batch first, so the recount below runs on a snapshot taken
+        # after every counter update already committed to these posts, and
+        # later ones wait for it instead of being overwritten.
+        ids = (
+            await session.scalars(
+                select(PostModel.id)
+                .where(PostModel.id > after_id)
+                .order_by(PostModel.id)
+                .limit(self.batch_size)
+                .with_for_update()
+            )
+        ).all()
+        if not ids:
+            await session.commit()
+            return None
+        last_id = ids[-1]
+
+        likes = (
+            select(func.count(LikeModel.id))
+            .where(LikeModel.post_id == PostModel.id)
+            .scalar_subquery()
+        )
+        comments = (
+            select(func.count(CommentModel.id))
+            .where(CommentModel.post_id == PostModel.id)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            update(PostModel)
+            .where(
+                PostModel.id.in_(ids),
+                or_(PostModel.like_count != likes, PostModel.comment_count != comments),
+            )
+            .values(
+                like_count=likes,
+                comment_count=comments,
+                updated_at=PostModel.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+        if result.rowcount:
+            metrics.counter("post_counters_corrected_total").inc(result.rowcount)
+            logger.warning(
+                "Corrected counters of %s posts with ids in (%s, %s]",
+                result.rowcount,
+                after_id,
+                last_id,
+            )
+        return last_id
+
+    async def run(self) -> None:
+        # Every API worker schedules this job, each on its own clock. A
+        # session-level advisory lock on a dedicated connection lets one of
+        # them reconcile, and holding it for the rest of the interval makes
+        # the others skip their turns in the meantime.
+        started_at = time.monotonic()
+        async with engine.connect() as connection:
+            locked = await connection.scalar(
+                select(func.pg_try_advisory_lock(RECONCILE_LOCK_ID))
+            )
+            await connection.commit()
+            if not locked:
+                logger.info("Post counters are being reconciled by another worker")
+                return
+            try:
+                after_id = 0
+                async with session_factory(bind=connection) as session:
+                    while True:
+                        after_id = await self._reconcile_batch(session, after_id)
+                        if after_id is None:
+                            break
+                        await asyncio.sleep(self.batch_pause)
+                await asyncio.sleep(started_at + self.interval - time.monotonic())
+            finally:
+                await connection.execute(
+                    select(func.pg_advisory_unlock(RECONCILE_LOCK_ID))
+                )
+                await connection.commit()
+
+
+post_counter_reconciler = PostCounterReconciler(
+    batch_size=settings.POST_COUNTERS_RECONCILE_BATCH_SIZE,
+    batch_pause=settings.POST_COUNTERS_RECONCILE_BATCH_PAUSE_SECONDS,
+    interval=settings.POST_COUNTERS_RECONCILE_SECONDS,
+)
@@ -2,7 +2,7 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from src.apps.users.models import User
 from src.apps.users.routers.auth import get_current_user
+from src.apps.users.schemas import UserPrincipal
 
-CurrentUserDep = Annotated[User, Depends(get_current_user)]
+CurrentUserDep = Annotated[UserPrincipal, Depends(get_current_user)]
@@ -1,29 +1,49 @@
 from datetime import datetime, timezone
 from typing import Annotated
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.apps.users.models import User
 from src.databases import Base
 
+# Text search configuration of posts.search_vector (posts mix languages, so no stemming)
+SEARCH_CONFIG = "simple"
+
 int_pk = Annotated[int, mapped_column(Integer, primary_key=True, index=True)]
 created_at = Annotated[
     datetime,
-    mapped_column(DateTime(timezone=True), default=datetime.now(tz=timezone.utc)),
+    mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(tz=timezone.utc)
+    ),
 ]
 updated_at = Annotated[
     datetime,
     mapped_column(
         DateTime(timezone=True),
-        default=datetime.now(tz=timezone.utc),
-        onupdate=datetime.now(tz=timezone.utc),
+        default=lambda: datetime.now(tz=timezone.utc),
+        onupdate=lambda: datetime.now(tz=timezone.utc),
     ),
 ]
 
 
 class PostModel(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int_pk]
     created_at: Mapped[created_at]
@@ -33,6 +53,23 @@ class PostModel(Base):
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
+    # Denormalized, kept in step by the like/comment endpoints
+    like_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    comment_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    # Maintained by Postgres; deferred so regular post queries don't fetch it
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     user: Mapped["User"] = relationship(
         backref="posts",
@@ -62,11 +99,17 @@ class LikeModel(Base):
     user: Mapped["User"] = relationship(backref="likes")
     post: Mapped["PostModel"] = relationship(back_populates="likes")
 
-    __table_args__ = (UniqueConstraint("user_id", "post_id", name="uq_user_post_like"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id", name="uq_user_post_like"),
+        Index("ix_likes_post_id_created_at_id", "post_id", "created_at", "id"),
+    )
 
 
 class CommentModel(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+    )
 
     id: Mapped[int_pk]
     created_at: Mapped[created_at]
@@ -81,3 +124,44 @@ class CommentModel(Base):
 
     user: Mapped["User"] = relationship(backref="comments")
     post: Mapped["PostModel"] = relationship(back_populates="comments")
+
+
+class TimelineEntry(Base):
+    """Precomputed home timeline: one row per (reader, post) fanned out on write."""
+
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "post_id"),
+        Index(
+            "ix_timeline_entries_user_id_created_at_post_id",
+            "user_id",
+            "created_at",
+            "post_id",
+        ),
+        Index("ix_timeline_entries_author_id", "author_id"),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), nullable=False
+    )
+    author_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+class PostScore(Base):
+    """
+    Time-decayed engagement of a post, kept in log space relative to a fixed
+    epoch so that it never has to be decayed in place (see trending.py).
+    """
+
+    __tablename__ = "post_scores"
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False, index=True)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.apps.posts.counters import change_count
 from src.apps.posts.dependencies import CurrentUserDep
-from src.apps.posts.models import CommentModel
+from src.apps.posts.models import CommentModel, PostModel
 from src.apps.posts.schemas import Comment, CommentUpdate
 from src.databases import get_async_db
 
@@ -57,5 +58,6 @@ async def delete_comment(
         )
 
     await session.delete(comment)
+    await change_count(session, comment.post_id, PostModel.comment_count, -1)
     await session.commit()
     return {"detail": "Comment deleted successfully"}
@@ -1,22 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from src.apps.posts.counters import change_count
 from src.apps.posts.dependencies import CurrentUserDep
 from src.apps.posts.models import CommentModel, LikeModel, PostModel
 from src.apps.posts.schemas import (
     Comment,
     CommentCreate,
+    CommentPage,
+    FeedPage,
     Like,
+    LikePage,
     Post,
     PostCreate,
+    PostSearchPage,
+    PostSummary,
     PostUpdate,
 )
+from src.apps.posts.search import search_posts
+from src.apps.posts.summaries import load_post_summaries, with_authors
+from src.apps.posts.timeline import fan_out_post, read_feed
+from src.apps.posts.trending import trending_posts
+from src.apps.users.dependencies import UserLoaderDep
+from src.apps.users.schemas import UserOut
 from src.databases import get_async_db
+from src.pagination import decode_cursor, keyset_page, split_page
+from src.settings.config import settings
 
 posts_router = APIRouter()
 
+MAX_SUMMARY_IDS = 100
+
 
 @posts_router.get("/")
 async def get_current_user_posts(
@@ -28,6 +46,57 @@ async def get_current_user_posts(
     return [Post.model_validate(post) for post in posts]
 
 
+@posts_router.get("/feed")
+async def get_feed(
+    user: CurrentUserDep,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_db),
+) -> FeedPage:
+    posts, next_cursor = await read_feed(session, user.id, cursor, limit)
+    return FeedPage(
+        items=[Post.model_validate(post) for post in posts], next_cursor=next_cursor
+    )
+
+
+@posts_router.get("/trending")
+async def get_trending_posts(
+    user: CurrentUserDep,
+    limit: int = Query(20, ge=1, le=settings.TRENDING_TOP_K),
+) -> list[Post]:
+    return await trending_posts.top(limit)
+
+
+@posts_router.get("/search")
+async def search(
+    user: CurrentUserDep,
+    q: str = Query(..., min_length=1, max_length=256),
+    author_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=50),
+    session: AsyncSession = Depends(get_async_db),
+) -> PostSearchPage:
+    results, next_cursor = await search_posts(
+        session, q, author_id, since, until, cursor, limit
+    )
+    return PostSearchPage(items=results, next_cursor=next_cursor)
+
+
+@posts_router.get("/summaries")
+async def get_post_summaries(
+    user: CurrentUserDep,
+    loader: UserLoaderDep,
+    ids: list[int] = Query(..., max_length=MAX_SUMMARY_IDS),
+    comments: int = Query(3, ge=0, le=10),
+    session: AsyncSession = Depends(get_async_db),
+) -> list[PostSummary]:
+    return await load_post_summaries(
+        session, loader, user.id, list(dict.fromkeys(ids)), comments
+    )
+
+
 @posts_router.get("/{post_id}")
 async def get_post_by_id(
     post_id: int,
@@ -52,6 +121,8 @@ async def create_post(
         user_id=user.id,
     )
     session.add(post)
+    await session.flush()
+    await fan_out_post(session, post)
     await session.commit()
     await session.refresh(post)
 
@@ -100,19 +171,28 @@ async def delete_post(
 async def get_post_comments(
     post_id: int,
     user: CurrentUserDep,
+    loader: UserLoaderDep,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
     session: AsyncSession = Depends(get_async_db),
-) -> list[Comment]:
-    query = (
-        select(PostModel)
-        .options(selectinload(PostModel.comments))
-        .where(PostModel.id == post_id)
+) -> CommentPage:
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    query = keyset_page(
+        select(CommentModel).where(CommentModel.post_id == post_id),
+        (CommentModel.created_at, CommentModel.id),
+        after,
+        limit,
     )
-    post = (await session.execute(query)).scalar_one_or_none()
-
-    if not post:
+    comments = (await session.scalars(query)).all()
+    if not comments and not await session.get(PostModel, post_id):
         raise HTTPException(status_code=404, detail="Post not found")
 
-    return [Comment.model_validate(comment) for comment in post.comments]
+    comments, next_cursor = split_page(
+        comments, limit, lambda comment: (comment.created_at, comment.id)
+    )
+    return CommentPage(
+        items=await with_authors(loader, comments), next_cursor=next_cursor
+    )
 
 
 @posts_router.post("/{post_id}/comments")
@@ -132,6 +212,8 @@ async def create_comment(
         post_id=post_id,
     )
     session.add(comment)
+    await change_count(session, post_id, PostModel.comment_count, 1)
+    await trending_posts.record(session, post_id, settings.TRENDING_COMMENT_WEIGHT)
     await session.commit()
     await session.refresh(comment)
 
@@ -142,14 +224,35 @@ async def create_comment(
 async def get_post_likes(
     post_id: int,
     user: CurrentUserDep,
+    loader: UserLoaderDep,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
     session: AsyncSession = Depends(get_async_db),
-) -> list[Like]:
-    post = await session.get(PostModel, post_id)
-    if not post:
+) -> LikePage:
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    query = keyset_page(
+        select(LikeModel).where(LikeModel.post_id == post_id),
+        (LikeModel.created_at, LikeModel.id),
+        after,
+        limit,
+    )
+    likes = (await session.scalars(query)).all()
+    if not likes and not await session.get(PostModel, post_id):
         raise HTTPException(status_code=404, detail="Post not found")
 
-    likes = await session.execute(select(LikeModel).where(LikeModel.post_id == post_id))
-    return [Like.model_validate(like) for like in likes.scalars().all()]
+    likes, next_cursor = split_page(
+        likes, limit, lambda like: (like.created_at, like.id)
+    )
+    authors = await loader.load_many(like.user_id for like in likes)
+    return LikePage(
+        items=[
+            Like.model_validate(like).model_copy(
+                update={"author": author and UserOut.model_validate(author)}
+            )
+            for like, author in zip(likes, authors)
+        ],
+        next_cursor=next_cursor,
+    )
 
 
 @posts_router.post("/{post_id}/likes")
@@ -158,26 +261,23 @@ async def like_post(
     user: CurrentUserDep,
     session: AsyncSession = Depends(get_async_db),
 ) -> Like:
-    query = (
-        select(PostModel)
-        .options(selectinload(PostModel.likes))
-        .where(PostModel.id == post_id)
-    )
-    post = (await session.execute(query)).scalar_one_or_none()
-
-    if not post:
+    if not await change_count(session, post_id, PostModel.like_count, 1):
         raise HTTPException(status_code=404, detail="Post not found")
 
-    for like in post.likes:
-        if like.user_id == user.id:
-            raise HTTPException(status_code=400, detail="You already liked this post")
+    like = await session.scalar(
+        insert(LikeModel)
+        .values(user_id=user.id, post_id=post_id)
+        .on_conflict_do_nothing(constraint="uq_user_post_like")
+        .returning(LikeModel)
+    )
+    if like is None:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="You already liked this post")
 
-    like = LikeModel(user_id=user.id, post_id=post_id)
-    session.add(like)
+    await trending_posts.record(session, post_id, settings.TRENDING_LIKE_WEIGHT)
+    like = Like.model_validate(like)
     await session.commit()
-    await session.refresh(like)
-
-    return Like.model_validate(like)
+    return like
 
 
 @posts_router.delete("/{post_id}/likes")
@@ -186,21 +286,17 @@ async def unlike_post(
     user: CurrentUserDep,
     session: AsyncSession = Depends(get_async_db),
 ):
-    post = await session.get(PostModel, post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-
-    like = await session.execute(
-        select(LikeModel).where(
-            LikeModel.user_id == user.id, LikeModel.post_id == post_id
-        )
+    like_id = await session.scalar(
+        delete(LikeModel)
+        .where(LikeModel.user_id == user.id, LikeModel.post_id == post_id)
+        .returning(LikeModel.id)
     )
-    like = like.scalar_one_or_none()
-
-    if not like:
+    if like_id is None:
+        if not await session.get(PostModel, post_id):
+            raise HTTPException(status_code=404, detail="Post not found")
         raise HTTPException(status_code=404, detail="Like not found")
 
-    await session.delete(like)
+    await change_count(session, post_id, PostModel.like_count, -1)
     await session.commit()
 
     return {"detail": "Post unliked successfully"}
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from src.apps.users.schemas import UserOut
+
 
 class PostBase(BaseModel):
     title: str
@@ -22,15 +24,24 @@ class Post(PostBase):
     created_at: datetime
     updated_at: datetime
     user_id: int
+    like_count: int = 0
+    comment_count: int = 0
 
     class Config:
         from_attributes = True
 
 
+class FeedPage(BaseModel):
+    items: list[Post]
+    next_cursor: str | None = None
+
+
 class Like(BaseModel):
     id: int
+    created_at: datetime
     user_id: int
     post_id: int
+    author: UserOut | None = None
 
     class Config:
         from_attributes = True
@@ -54,6 +65,36 @@ class Comment(CommentBase):
     updated_at: datetime
     user_id: int
     post_id: int
+    author: UserOut | None = None
 
     class Config:
         from_attributes = True
+
+
+class LikePage(BaseModel):
+    items: list[Like]
+    next_cursor: str | None = None
+
+
+class CommentPage(BaseModel):
+    items: list[Comment]
+    next_cursor: str | None = None
+
+
+class PostSummary(BaseModel):
+    post_id: int
+    like_count: int
+    comment_count: int
+    liked: bool
+    latest_comments: list[Comment]
+
+
+class PostSearchResult(Post):
+    rank: float
+    title_highlight: str
+    snippet: str
+
+
+class PostSearchPage(BaseModel):
+    items: list[PostSearchResult]
+    next_cursor: str | None = None
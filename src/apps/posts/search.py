@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy import REAL, cast, func, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.posts.models import SEARCH_CONFIG, PostModel
+from src.apps.posts.schemas import Post, PostSearchResult
+from src.pagination import decode_cursor, keyset_page, split_page
+
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8"
+)
+
+
+async def search_posts(
+    session: AsyncSession,
+    term: str,
+    author_id: int | None,
+    since: datetime | None,
+    until: datetime | None,
+    cursor: str | None,
+    limit: int,
+) -> tuple[list[PostSearchResult], str | None]:
+    config = cast(SEARCH_CONFIG, REGCONFIG)
+    query = func.websearch_to_tsquery(config, term)
+    rank = func.ts_rank_cd(PostModel.search_vector, query, type_=REAL)
+
+    # Match and rank through the GIN index, keyset by (rank, id).
+    matches = select(PostModel.id, rank.label("rank")).where(
+        PostModel.search_vector.bool_op("@@")(query)
+    )
+    if author_id is not None:
+        matches = matches.where(PostModel.user_id == author_id)
+    if since is not None:
+        matches = matches.where(PostModel.created_at >= since)
+    if until is not None:
+        matches = matches.where(PostModel.created_at < until)
+    after = decode_cursor(cursor, float, int) if cursor else None
+    page = keyset_page(matches, (rank, PostModel.id), after, limit).subquery()
+
+    # Headlines are expensive, so they're built for the page rows only.
+    rows = (
+        await session.execute(
+            select(
+                PostModel,
+                page.c.rank,
+                func.ts_headline(config, PostModel.title, query, HEADLINE_OPTIONS),
+                func.ts_headline(config, PostModel.content, query, HEADLINE_OPTIONS),
+            )
+            .join(page, page.c.id == PostModel.id)
+            .order_by(page.c.rank.desc(), page.c.id.desc())
+        )
+    ).all()
+
+    results = [
+        PostSearchResult(
+            **Post.model_validate(post).model_dump(),
+            rank=score,
+            title_highlight=title,
+            snippet=snippet,
+        )
+        for post, score, title, snippet in rows
+    ]
+    return split_page(results, limit, lambda result: (result.rank, result.id))
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from sqlalchemy import select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.apps.posts.models import CommentModel, LikeModel, PostModel
+from src.apps.posts.schemas import Comment, PostSummary
+from src.apps.users.loaders import UserLoader
+from src.apps.users.schemas import UserOut
+
+
+async def with_authors(loader: UserLoader, comments) -> list[Comment]:
+    authors = await loader.load_many(comment.user_id for comment in comments)
+    return [
+        Comment.model_validate(comment).model_copy(
+            update={"author": author and UserOut.model_validate(author)}
+        )
+        for comment, author in zip(comments, authors)
+    ]
+
+
+async def load_post_summaries(
+    session: AsyncSession,
+    loader: UserLoader,
+    user_id: int,
+    post_ids: list[int],
+    comments_limit: int,
+) -> list[PostSummary]:
+    """
+    Counters, the caller's like and the newest comments of many posts in a
+    fixed number of queries (plus one batched author lookup), however many
+    posts are asked for.
+    """
+    posts = (
+        await session.execute(
+            select(PostModel.id, PostModel.like_count, PostModel.comment_count).where(
+                PostModel.id.in_(post_ids)
+            )
+        )
+    ).all()
+    found_ids = [post.id for post in posts]
+    if not found_ids:
+        return []
+
+    # Served by the (user_id, post_id) unique index.
+    liked = set(
+        await session.scalars(
+            select(LikeModel.post_id).where(
+                LikeModel.user_id == user_id, LikeModel.post_id.in_(found_ids)
+            )
+        )
+    )
+
+    latest = defaultdict(list)
+    if comments_limit:
+        # One LATERAL subquery per post, each a short scan of the
+        # (post_id, created_at, id) index.
+        ids = select(PostModel.id).where(PostModel.id.in_(found_ids)).subquery()
+        newest = (
+            select(CommentModel)
+            .where(CommentModel.post_id == ids.c.id)
+            .order_by(CommentModel.created_at.desc(), CommentModel.id.desc())
+            .limit(comments_limit)
+            .lateral()
+        )
+        newest_comment = aliased(CommentModel, newest)
+        rows = (
+            await session.scalars(
+                select(newest_comment)
+                .select_from(ids)
+                .join(newest, true())
+                .order_by(
+                    newest_comment.post_id,
+                    newest_comment.created_at.desc(),
+                    newest_comment.id.desc(),
+                )
+            )
+        ).all()
+        for comment, full in zip(rows, await with_authors(loader, rows)):
+            latest[comment.post_id].append(full)
+
+    order = {post_id: index for index, post_id in enumerate(post_ids)}
+    return [
+        PostSummary(
+            post_id=post.id,
+            like_count=post.like_count,
+            comment_count=post.comment_count,
+            liked=post.id in liked,
+            latest_comments=latest[post.id],
+        )
+        for post in sorted(posts, key=lambda post: order[post.id])
+    ]
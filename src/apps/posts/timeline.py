@@ -0,0 +1,166 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.friends.models import Friendship
+from src.apps.posts.models import PostModel, TimelineEntry
+from src.apps.users.models import User
+from src.metrics import metrics
+from src.pagination import decode_cursor, keyset_page, split_page
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def friend_ids_query(user_id: int):
+    return select(Friendship.friend_id).where(Friendship.user_id == user_id).subquery()
+
+
+async def _should_fan_out_on_read(session: AsyncSession, author_id: int) -> bool:
+    flagged = await session.scalar(
+        select(User.timeline_fanout_on_read).where(User.id == author_id)
+    )
+    if flagged:
+        return True
+
+    friends = friend_ids_query(author_id)
+    friend_count = await session.scalar(select(func.count()).select_from(friends))
+    posts_today = await session.scalar(
+        select(func.count(PostModel.id)).where(
+            PostModel.user_id == author_id,
+            PostModel.created_at >= datetime.now(timezone.utc) - timedelta(days=1),
+        )
+    )
+    if (
+        friend_count <= settings.FEED_FANOUT_MAX_FRIENDS
+        and posts_today <= settings.FEED_FANOUT_MAX_POSTS_PER_DAY
+    ):
+        return False
+
+    # Sticky, so an author does not flip between strategies from day to day.
+    await session.execute(
+        update(User).where(User.id == author_id).values(timeline_fanout_on_read=True)
+    )
+    logger.info(
+        "User with id '%s' switched to fan-out on read (%s friends, %s posts/day)",
+        author_id,
+        friend_count,
+        posts_today,
+    )
+    return True
+
+
+async def fan_out_post(session: AsyncSession, post: PostModel) -> None:
+    """Push a new post into its readers' timelines; runs in the post's transaction."""
+    reader_ids = select(literal(post.user_id).label("reader_id"))
+    if await _should_fan_out_on_read(session, post.user_id):
+        strategy = "read"
+    else:
+        strategy = "write"
+        friends = friend_ids_query(post.user_id)
+        reader_ids = reader_ids.union(select(friends.c.friend_id))
+    readers = reader_ids.subquery()
+
+    result = await session.execute(
+        insert(TimelineEntry)
+        .from_select(
+            ["user_id", "post_id", "author_id", "created_at"],
+            select(
+                readers.c.reader_id,
+                literal(post.id),
+                literal(post.user_id),
+                literal(post.created_at, TimelineEntry.created_at.type),
+            ),
+        )
+        .on_conflict_do_nothing()
+    )
+    metrics.counter("timeline_fanout_total", strategy=strategy).inc()
+    metrics.histogram("timeline_fanout_rows", buckets=(1, 10, 100, 1000, 5000)).observe(
+        result.rowcount
+    )
+
+
+async def _backfill(session: AsyncSession, reader_id: int, author_id: int) -> None:
+    recent = (
+        select(PostModel.id, PostModel.created_at)
+        .join(User, User.id == PostModel.user_id)
+        .where(PostModel.user_id == author_id, User.timeline_fanout_on_read == False)
+        .order_by(PostModel.created_at.desc(), PostModel.id.desc())
+        .limit(settings.FEED_BACKFILL_POSTS)
+        .subquery()
+    )
+    await session.execute(
+        insert(TimelineEntry)
+        .from_select(
+            ["user_id", "post_id", "author_id", "created_at"],
+            select(
+                literal(reader_id), recent.c.id, literal(author_id), recent.c.created_at
+            ),
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+async def backfill_timelines(session: AsyncSession, user_id: int, friend_id: int):
+    """Seed both timelines with each other's recent posts on a new friendship."""
+    await _backfill(session, user_id, friend_id)
+    await _backfill(session, friend_id, user_id)
+
+
+async def remove_from_timelines(session: AsyncSession, user_id: int, friend_id: int):
+    await session.execute(
+        delete(TimelineEntry).where(
+            or_(
+                (TimelineEntry.user_id == user_id)
+                & (TimelineEntry.author_id == friend_id),
+                (TimelineEntry.user_id == friend_id)
+                & (TimelineEntry.author_id == user_id),
+            )
+        )
+    )
+
+
+async def read_feed(
+    session: AsyncSession, user_id: int, cursor: str | None, limit: int
+) -> tuple[list[PostModel], str | None]:
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+
+    # Pushed posts: one range scan of the reader's timeline index.
+    pushed = keyset_page(
+        select(PostModel)
+        .join(TimelineEntry, TimelineEntry.post_id == PostModel.id)
+        .where(TimelineEntry.user_id == user_id),
+        (TimelineEntry.created_at, TimelineEntry.post_id),
+        after,
+        limit,
+    )
+    posts = list((await session.execute(pushed)).scalars())
+
+    # Pulled posts: friends too prolific to fan out, read via their posts index.
+    friends = friend_ids_query(user_id)
+    pulled_authors = (
+        await session.scalars(
+            select(User.id).where(
+                User.id.in_(select(friends.c.friend_id)),
+                User.timeline_fanout_on_read == True,
+            )
+        )
+    ).all()
+    if pulled_authors:
+        pulled = keyset_page(
+            select(PostModel).where(PostModel.user_id.in_(pulled_authors)),
+            (PostModel.created_at, PostModel.id),
+            after,
+            limit,
+        )
+        posts += (await session.execute(pulled)).scalars()
+        posts = sorted(
+            {post.id: post for post in posts}.values(),
+            key=lambda post: (post.created_at, post.id),
+            reverse=True,
+        )
+
+    return split_page(posts, limit, lambda post: (post.created_at, post.id))
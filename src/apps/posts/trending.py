@@ -0,0 +1,117 @@
+"""
+Trending posts.
+
+A post's trending score is the sum of its engagement events, each weighted
+and decayed exponentially with age:
+
+    score(t) = sum(w_i * exp(-decay * (t - t_i)))
+
+exp(-decay * t) is a common factor of every post, so posts rank the same by
+log(sum(w_i * exp(decay * (t_i - EPOCH)))). That value only changes when an
+event arrives, so it is stored per post and bumped with a log-add-exp upsert
+instead of being recomputed or decayed by a job.
+"""
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.posts.models import PostModel, PostScore
+from src.apps.posts.schemas import Post
+from src.apps.users.models import User
+from src.cache import TTLCache
+from src.databases import session_factory
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _log_weight(weight: float, decay: float, at: datetime) -> float:
+    return math.log(weight) + decay * (at - EPOCH).total_seconds()
+
+
+@dataclass
+class TrendingPosts:
+    half_life: float
+    top_k: int
+    cache_ttl: float
+    min_score: float
+    _cache: TTLCache[str, list[Post]] = field(init=False, repr=False)
+    _refresh_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+
+    def __post_init__(self):
+        self._cache = TTLCache(ttl=self.cache_ttl, max_size=1)
+
+    @property
+    def decay(self) -> float:
+        return math.log(2) / self.half_life
+
+    async def record(self, session: AsyncSession, post_id: int, weight: float) -> None:
+        """Add an engagement event; runs in the transaction of the like/comment."""
+        value = _log_weight(weight, self.decay, datetime.now(timezone.utc))
+        stmt = insert(PostScore).values(post_id=post_id, score=value)
+        current, new = PostScore.score, stmt.excluded.score
+        # log(exp(a) + exp(b)) without overflowing exp().
+        combined = func.greatest(current, new) + func.ln(
+            1 + func.exp(-func.abs(current - new))
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[PostScore.post_id], set_={"score": combined}
+            )
+        )
+
+    async def refresh(self) -> list[Post]:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(PostModel)
+                .join(PostScore, PostScore.post_id == PostModel.id)
+                .join(User, User.id == PostModel.user_id)
+                .where(User.is_active == True)
+                .order_by(PostScore.score.desc())
+                .limit(self.top_k)
+            )
+            posts = [Post.model_validate(post) for post in result.scalars()]
+
+            # Posts whose decayed score fell below min_score can't come back
+            # without new events (which re-insert them), so drop them.
+            floor = _log_weight(self.min_score, self.decay, datetime.now(timezone.utc))
+            pruned = await session.execute(
+                delete(PostScore).where(PostScore.score < floor)
+            )
+            await session.commit()
+
+        metrics.gauge("trending_posts").set(len(posts))
+        if pruned.rowcount:
+            metrics.counter("trending_scores_pruned_total").inc(pruned.rowcount)
+        return self._cache.set("top", posts)
+
+    async def top(self, limit: int) -> list[Post]:
+        posts = self._cache.get("top")
+        if posts is None:
+            metrics.counter("trending_cache_total", result="miss").inc()
+            # One refresh for all requests that found the cache cold.
+            async with self._refresh_lock:
+                posts = self._cache.get("top")
+                if posts is None:
+                    posts = await self.refresh()
+        else:
+            metrics.counter("trending_cache_total", result="hit").inc()
+        return posts[:limit]
+
+
+trending_posts = TrendingPosts(
+    half_life=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+    top_k=settings.TRENDING_TOP_K,
+    cache_ttl=settings.TRENDING_CACHE_TTL_SECONDS,
+    min_score=settings.TRENDING_MIN_SCORE,
+)
@@ -0,0 +1,52 @@
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.users.models import User
+from src.apps.users.schemas import UserPrincipal
+from src.cache import TTLCache
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserPrincipalCache:
+    cache: TTLCache[int, UserPrincipal]
+
+    def get(self, user_id: int) -> UserPrincipal | None:
+        principal = self.cache.get(user_id)
+        metrics.counter(
+            'user_principal_cache_total', result='miss' if principal is None else 'hit'
+        ).inc()
+        return principal
+
+    def put(self, user: User) -> UserPrincipal:
+        return self.cache.set(user.id, UserPrincipal.model_validate(user))
+
+    def invalidate(self, user_id: int) -> None:
+        logger.info("Invalidating cached principal of user with id '%s'", user_id)
+        self.cache.invalidate(user_id)
+
+
+user_principal_cache = UserPrincipalCache(
+    cache=TTLCache(
+        ttl=settings.USER_CACHE_TTL_SECONDS, max_size=settings.USER_CACHE_MAX_SIZE
+    )
+)
+
+
+async def get_active_user_principal(
+    session: AsyncSession, user_id: int
+) -> UserPrincipal | None:
+    principal = user_principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = await session.get(User, user_id)
+    if not user or not user.is_active:
+        return None
+
+    return user_principal_cache.put(user)
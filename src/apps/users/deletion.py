@@ -0,0 +1,407 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from beanie.operators import In, Pull, Set
+from pydantic import BaseModel
+from sqlalchemy import delete, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.chats.models import ChatModel, ChatPermissionsModel, MessageModel
+from src.apps.chats.summaries import chat_summaries
+from src.apps.friends.models import FriendRequest, Friendship
+from src.apps.posts.counters import decrement_counts
+from src.apps.posts.models import CommentModel, LikeModel, PostModel, TimelineEntry
+from src.apps.users.cache import user_principal_cache
+from src.apps.users.models import (
+    AccountDeletionJob,
+    AccountDeletionStatus,
+    RevokedToken,
+    User,
+)
+from src.databases import session_factory
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A stage removes at most one batch per call and returns how much it removed;
+# it is finished once it returns 0. Stages must be safe to re-run.
+Stage = Callable[[AsyncSession, int, int], Awaitable[int]]
+
+
+class _DocumentId(BaseModel):
+    id: UUID
+
+    class Settings:
+        projection = {"id": "$_id"}
+
+
+async def schedule_account_deletion(
+    session: AsyncSession, user: User
+) -> AccountDeletionJob:
+    user_id = user.id
+    user.is_active = False
+    user.deleted_at = datetime.now(timezone.utc)
+    job = AccountDeletionJob(user_id=user_id)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+
+    user_principal_cache.invalidate(user_id)
+    metrics.counter("account_deletions_requested_total").inc()
+    logger.info("Scheduled deletion of user with id '%s' (job %s)", user_id, job.id)
+    return job
+
+
+async def _delete_batch(session: AsyncSession, model, condition, batch_size: int):
+    ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+    result = await session.execute(
+        delete(model)
+        .where(model.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def _delete_messages(condition, batch_size: int) -> int:
+    messages = (
+        await MessageModel.find(condition)
+        .limit(batch_size)
+        .project(_DocumentId)
+        .to_list()
+    )
+    if messages:
+        await MessageModel.find(In(MessageModel.id, [m.id for m in messages])).delete()
+    return len(messages)
+
+
+async def _leave_chat(chat: ChatModel, user_id: int, batch_size: int) -> None:
+    remaining = [member_id for member_id in chat.member_ids if member_id != user_id]
+    # The summary may quote the user; it is rebuilt from what is left.
+    await chat_summaries.forget(chat.id)
+
+    if not remaining:
+        # A chat with nobody left goes away with its history. Otherwise the
+        # others keep it, private chats included; the user's own messages
+        # are removed by purge_messages.
+        while await _delete_messages(MessageModel.chat_id == chat.id, batch_size):
+            await asyncio.sleep(settings.ACCOUNT_DELETION_BATCH_PAUSE_SECONDS)
+        await ChatPermissionsModel.find(
+            ChatPermissionsModel.chat_id == chat.id
+        ).delete()
+        await ChatModel.find_one(ChatModel.id == chat.id).delete()
+        return
+
+    await ChatPermissionsModel.find(
+        ChatPermissionsModel.chat_id == chat.id,
+        ChatPermissionsModel.user_id == user_id,
+    ).delete()
+    if chat.owner_id == user_id:
+        new_owner_id = remaining[0]
+        await ChatPermissionsModel.find(
+            ChatPermissionsModel.chat_id == chat.id,
+            ChatPermissionsModel.user_id == new_owner_id,
+        ).update(
+            Set(
+                {
+                    ChatPermissionsModel.can_send_messages: True,
+                    ChatPermissionsModel.can_change_permissions: True,
+                    ChatPermissionsModel.can_remove_members: True,
+                    ChatPermissionsModel.can_delete_other_messages: True,
+                }
+            )
+        )
+        await ChatModel.find_one(ChatModel.id == chat.id).update(
+            Set({ChatModel.owner_id: new_owner_id})
+        )
+        logger.info(
+            "Transferred chat with id '%s' to user with id '%s'", chat.id, new_owner_id
+        )
+    await ChatModel.find_one(ChatModel.id == chat.id).update(
+        Pull({ChatModel.member_ids: user_id})
+    )
+
+
+async def purge_chats(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    chats = (
+        await ChatModel.find(In(ChatModel.member_ids, [user_id]))
+        .limit(min(batch_size, 100))
+        .to_list()
+    )
+    for chat in chats:
+        await _leave_chat(chat, user_id, batch_size)
+    return len(chats)
+
+
+async def purge_messages(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    return await _delete_messages(MessageModel.sender_id == user_id, batch_size)
+
+
+async def purge_chat_permissions(
+    session: AsyncSession, user_id: int, batch_size: int
+) -> int:
+    permissions = (
+        await ChatPermissionsModel.find(ChatPermissionsModel.user_id == user_id)
+        .limit(batch_size)
+        .project(_DocumentId)
+        .to_list()
+    )
+    if permissions:
+        await ChatPermissionsModel.find(
+            In(ChatPermissionsModel.id, [p.id for p in permissions])
+        ).delete()
+    return len(permissions)
+
+
+async def purge_timeline_entries(
+    session: AsyncSession, user_id: int, batch_size: int
+) -> int:
+    key = tuple_(TimelineEntry.user_id, TimelineEntry.post_id)
+    keys = (
+        select(TimelineEntry.user_id, TimelineEntry.post_id)
+        .where(
+            or_(TimelineEntry.user_id == user_id, TimelineEntry.author_id == user_id)
+        )
+        .limit(batch_size)
+    )
+    result = await session.execute(
+        delete(TimelineEntry)
+        .where(key.in_(keys))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def _delete_counted(
+    session: AsyncSession, model, condition, counter, batch_size: int
+) -> int:
+    # Likes/comments on other users' posts: keep those posts' counters right.
+    ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+    result = await session.execute(
+        delete(model)
+        .where(model.id.in_(ids))
+        .returning(model.post_id)
+        .execution_options(synchronize_session=False)
+    )
+    post_ids = result.scalars().all()
+    await decrement_counts(session, counter, post_ids)
+    return len(post_ids)
+
+
+async def purge_likes(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    return await _delete_counted(
+        session,
+        LikeModel,
+        LikeModel.user_id == user_id,
+        PostModel.like_count,
+        batch_size,
+    )
+
+
+async def purge_comments(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    return await _delete_counted(
+        session,
+        CommentModel,
+        CommentModel.user_id == user_id,
+        PostModel.comment_count,
+        batch_size,
+    )
+
+
+async def purge_post_likes(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    posts = select(PostModel.id).where(PostModel.user_id == user_id)
+    return await _delete_batch(
+        session, LikeModel, LikeModel.post_id.in_(posts), batch_size
+    )
+
+
+async def purge_post_comments(
+    session: AsyncSession, user_id: int, batch_size: int
+) -> int:
+    posts = select(PostModel.id).where(PostModel.user_id == user_id)
+    return await _delete_batch(
+        session, CommentModel, CommentModel.post_id.in_(posts), batch_size
+    )
+
+
+async def purge_posts(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    return await _delete_batch(
+        session, PostModel, PostModel.user_id == user_id, batch_size
+    )
+
+
+async def purge_friendships(
+    session: AsyncSession, user_id: int, batch_size: int
+) -> int:
+    keys = (
+        select(Friendship.user_id, Friendship.friend_id)
+        .where(or_(Friendship.user_id == user_id, Friendship.friend_id == user_id))
+        .limit(batch_size)
+    )
+    result = await session.execute(
+        delete(Friendship)
+        .where(tuple_(Friendship.user_id, Friendship.friend_id).in_(keys))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def purge_friend_requests(
+    session: AsyncSession, user_id: int, batch_size: int
+) -> int:
+    return await _delete_batch(
+        session,
+        FriendRequest,
+        or_(FriendRequest.from_user_id == user_id, FriendRequest.to_user_id == user_id),
+        batch_size,
+    )
+
+
+async def purge_revoked_tokens(
+    session: AsyncSession, user_id: int, batch_size: int
+) -> int:
+    return await _delete_batch(
+        session, RevokedToken, RevokedToken.user_id == user_id, batch_size
+    )
+
+
+async def purge_user(session: AsyncSession, user_id: int, batch_size: int) -> int:
+    result = await session.execute(delete(User).where(User.id == user_id))
+    return result.rowcount
+
+
+PURGE_STAGES: list[tuple[str, Stage]] = [
+    ("chats", purge_chats),
+    ("messages", purge_messages),
+    ("chat_permissions", purge_chat_permissions),
+    ("timeline_entries", purge_timeline_entries),
+    ("likes", purge_likes),
+    ("comments", purge_comments),
+    ("post_likes", purge_post_likes),
+    ("post_comments", purge_post_comments),
+    ("posts", purge_posts),
+    ("friendships", purge_friendships),
+    ("friend_requests", purge_friend_requests),
+    ("revoked_tokens", purge_revoked_tokens),
+    ("user", purge_user),
+]
+
+
+@dataclass
+class AccountPurger:
+    batch_size: int
+    batch_pause: float
+    lease: float
+    max_attempts: int
+
+    async def _claim(self, session: AsyncSession) -> AccountDeletionJob | None:
+        now = datetime.now(timezone.utc)
+        result = await session.execute(
+            select(AccountDeletionJob)
+            .where(
+                AccountDeletionJob.status.in_(
+                    [AccountDeletionStatus.pending, AccountDeletionStatus.running]
+                ),
+                or_(
+                    AccountDeletionJob.locked_until.is_(None),
+                    AccountDeletionJob.locked_until < now,
+                ),
+            )
+            .order_by(AccountDeletionJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalars().first()
+        if job:
+            job.status = AccountDeletionStatus.running
+            job.locked_until = now + timedelta(seconds=self.lease)
+            await session.commit()
+        return job
+
+    async def _process(self, session: AsyncSession, job: AccountDeletionJob) -> None:
+        names = [name for name, _ in PURGE_STAGES]
+        start = names.index(job.stage) if job.stage in names else 0
+
+        for name, stage in PURGE_STAGES[start:]:
+            job.stage = name
+            while True:
+                removed = await stage(session, job.user_id, self.batch_size)
+                job.deleted_rows += removed
+                job.locked_until = datetime.now(timezone.utc) + timedelta(
+                    seconds=self.lease
+                )
+                # Each batch is its own short transaction.
+                await session.commit()
+                metrics.counter("account_deletion_rows_total", stage=name).inc(removed)
+                if not removed:
+                    break
+                await asyncio.sleep(self.batch_pause)
+
+        job.status = AccountDeletionStatus.completed
+        job.stage = None
+        job.locked_until = None
+        job.completed_at = datetime.now(timezone.utc)
+        await session.commit()
+
+        metrics.counter("account_deletions_completed_total").inc()
+        metrics.histogram("account_deletion_seconds").observe(
+            (job.completed_at - job.created_at).total_seconds()
+        )
+        logger.info(
+            "Purged user with id '%s' (%s rows/documents)",
+            job.user_id,
+            job.deleted_rows,
+        )
+
+    async def _fail(self, session: AsyncSession, job_id: int, exc: Exception) -> None:
+        await session.rollback()
+        job = await session.get(AccountDeletionJob, job_id)
+        job.attempts += 1
+        job.last_error = str(exc)
+        if job.attempts >= self.max_attempts:
+            job.status = AccountDeletionStatus.failed
+            job.locked_until = None
+        else:
+            # Leave the lease in place as a backoff before the next attempt.
+            job.locked_until = datetime.now(timezone.utc) + timedelta(
+                seconds=self.lease * job.attempts
+            )
+        await session.commit()
+        metrics.counter("account_deletions_failed_total").inc()
+
+    async def run(self) -> None:
+        # Jobs are read back after every batch commit.
+        async with session_factory(expire_on_commit=False) as session:
+            pending = await session.scalar(
+                select(func.count(AccountDeletionJob.id)).where(
+                    AccountDeletionJob.status.in_(
+                        [AccountDeletionStatus.pending, AccountDeletionStatus.running]
+                    )
+                )
+            )
+            metrics.gauge("account_deletion_jobs_pending").set(pending)
+
+            while job := await self._claim(session):
+                job_id, user_id = job.id, job.user_id
+                try:
+                    await self._process(session, job)
+                except Exception as exc:
+                    logger.exception(
+                        "Deletion of user with id '%s' failed at stage '%s'",
+                        user_id,
+                        job.stage,
+                    )
+                    await self._fail(session, job_id, exc)
+                metrics.gauge("account_deletion_jobs_pending").dec()
+
+
+account_purger = AccountPurger(
+    batch_size=settings.ACCOUNT_DELETION_BATCH_SIZE,
+    batch_pause=settings.ACCOUNT_DELETION_BATCH_PAUSE_SECONDS,
+    lease=settings.ACCOUNT_DELETION_LEASE_SECONDS,
+    max_attempts=settings.ACCOUNT_DELETION_MAX_ATTEMPTS,
+)
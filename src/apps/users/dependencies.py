@@ -3,7 +3,10 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, WebSocket, WebSocketException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.apps.users.models import User
+from src.apps.users.cache import get_active_user_principal
+from src.apps.users.loaders import UserLoader
+from src.apps.users.revocation import token_revocation
+from src.apps.users.schemas import UserPrincipal
 from src.apps.users.security import decode_token
 from src.databases import get_async_db, session_factory
 
@@ -21,9 +24,9 @@ SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 async def get_user_by_id(
     user_id: int, session: AsyncSession = Depends(get_async_db)
-) -> User:
-    user = await session.get(User, user_id)
-    if not user or not user.is_active:
+) -> UserPrincipal:
+    user = await get_active_user_principal(session, user_id)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
@@ -32,13 +35,20 @@ async def get_user_by_id(
     return user
 
 
-CheckUserExistsByIDDep = Annotated[User, Depends(get_user_by_id)]
+CheckUserExistsByIDDep = Annotated[UserPrincipal, Depends(get_user_by_id)]
+
+
+def get_user_loader(session: AsyncSession = Depends(get_async_db)) -> UserLoader:
+    return UserLoader(session=session)
+
+
+UserLoaderDep = Annotated[UserLoader, Depends(get_user_loader)]
 
 
 async def get_current_websocket_user(
     websocket: WebSocket,
     session: AsyncSession = Depends(get_async_db),
-) -> User:
+) -> UserPrincipal:
     token = websocket.query_params.get("token")
 
     if not token:
@@ -56,13 +66,19 @@ async def get_current_websocket_user(
         if payload.get("type") != "access":
             raise ValueError()
         user_id = int(payload["sub"])
+        jti = payload["jti"]
     except Exception:
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token"
         )
 
-    user = await session.get(User, user_id)
-    if not user or not user.is_active:
+    if await token_revocation.is_revoked(session, jti):
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Token has been revoked"
+        )
+
+    user = await get_active_user_principal(session, user_id)
+    if not user:
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION, reason="Inactive user"
         )
@@ -70,4 +86,4 @@ async def get_current_websocket_user(
     return user
 
 
-CurrentWebsocketUserDep = Annotated[User, Depends(get_current_websocket_user)]
+CurrentWebsocketUserDep = Annotated[UserPrincipal, Depends(get_current_websocket_user)]
@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+
+class TooManyRequestsException(HTTPException):
+    def __init__(
+        self, retry_after: int, detail: str = "Too many requests, try again later"
+    ):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,92 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.users.cache import user_principal_cache
+from src.apps.users.models import User
+from src.apps.users.schemas import UserPrincipal
+from src.metrics import metrics
+
+MAX_BATCH_SIZE = 1000
+
+
+@dataclass
+class UserLoader:
+    """
+    Request-scoped batcher: every load() issued during the same event loop
+    tick is resolved by a single IN query (cached principals are reused).
+    """
+
+    session: AsyncSession
+    _loaded: dict[int, UserPrincipal | None] = field(default_factory=dict)
+    _queue: dict[int, asyncio.Future] = field(default_factory=dict)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _tasks: set[asyncio.Task] = field(default_factory=set)
+
+    async def load(self, user_id: int) -> UserPrincipal | None:
+        if user_id in self._loaded:
+            return self._loaded[user_id]
+
+        future = self._queue.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._queue:
+                loop.call_soon(self._schedule_dispatch)
+            future = self._queue[user_id] = loop.create_future()
+        return await future
+
+    async def load_many(self, user_ids: Iterable[int]) -> list[UserPrincipal | None]:
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def prime(self, user: UserPrincipal) -> None:
+        self._loaded[user.id] = user
+
+    def _schedule_dispatch(self) -> None:
+        task = asyncio.create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        queue, self._queue = self._queue, {}
+        try:
+            # One session cannot run two queries at once.
+            async with self._lock:
+                users = await self._fetch(list(queue))
+        except Exception as exc:
+            for future in queue.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for user_id, future in queue.items():
+            self._loaded[user_id] = users.get(user_id)
+            if not future.done():
+                future.set_result(self._loaded[user_id])
+
+    async def _fetch(self, user_ids: list[int]) -> dict[int, UserPrincipal]:
+        users = {}
+        missing = []
+        for user_id in user_ids:
+            principal = user_principal_cache.get(user_id)
+            if principal is None:
+                missing.append(user_id)
+            else:
+                users[user_id] = principal
+
+        for start in range(0, len(missing), MAX_BATCH_SIZE):
+            result = await self.session.execute(
+                select(User).where(
+                    User.id.in_(missing[start : start + MAX_BATCH_SIZE]),
+                    User.is_active == True,
+                )
+            )
+            for user in result.scalars():
+                users[user.id] = user_principal_cache.put(user)
+
+        metrics.histogram(
+            'user_loader_batch_size', buckets=(1, 5, 10, 50, 100, 500, 1000)
+        ).observe(len(user_ids))
+        return users
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+from sqlalchemy import select, update
+
+from src.apps.users.models import EmailOutbox, EmailStatus
+from src.databases import session_factory
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors about a single message, after which the connection can be reused.
+MESSAGE_ERRORS = (
+    aiosmtplib.SMTPRecipientsRefused,
+    aiosmtplib.SMTPRecipientRefused,
+    aiosmtplib.SMTPSenderRefused,
+    aiosmtplib.SMTPDataError,
+)
+
+
+@dataclass
+class SMTPConnectionPool:
+    size: int
+    _idle: asyncio.LifoQueue = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._idle = asyncio.LifoQueue(maxsize=self.size)
+        for _ in range(self.size):
+            self._idle.put_nowait(None)
+
+    def _create_client(self) -> aiosmtplib.SMTP:
+        return aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.MAIL_VALIDATE_CERTS,
+            timeout=settings.MAIL_TIMEOUT_SECONDS,
+        )
+
+    async def _connect(self, client: aiosmtplib.SMTP) -> None:
+        await client.connect()
+        if settings.MAIL_USE_CREDENTIALS:
+            await client.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        metrics.counter('mail_smtp_connections_total').inc()
+
+    @asynccontextmanager
+    async def connection(self):
+        client = await self._idle.get()
+        try:
+            if client is None or not client.is_connected:
+                client = self._create_client()
+                await self._connect(client)
+            yield client
+        except MESSAGE_ERRORS:
+            # The server refused this message; the session itself is fine.
+            raise
+        except BaseException:
+            # Anything else (a failed login, a dropped or cancelled session)
+            # may leave the client unusable, so drop it and let the next
+            # caller reconnect.
+            if client is not None:
+                client.close()
+            client = None
+            raise
+        finally:
+            self._idle.put_nowait(client)
+
+    async def close(self) -> None:
+        clients = []
+        while not self._idle.empty():
+            clients.append(self._idle.get_nowait())
+        for client in clients:
+            if client is not None and client.is_connected:
+                try:
+                    await client.quit()
+                except aiosmtplib.SMTPException:
+                    client.close()
+            self._idle.put_nowait(None)
+
+
+@dataclass
+class MailDispatcher:
+    pool: SMTPConnectionPool
+    batch_size: int
+    rate_per_second: float
+    max_attempts: int
+    backoff: float
+    backoff_max: float
+    # Long enough for a whole batch to go out at `rate_per_second`.
+    lease: float
+    _next_send_at: float = field(default=0.0, init=False)
+    _rate_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+
+    def _build_message(self, email: EmailOutbox) -> EmailMessage:
+        message = EmailMessage()
+        message['From'] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message['To'] = email.recipient
+        message['Subject'] = email.subject
+        message.set_content(email.body)
+        return message
+
+    async def _throttle(self) -> None:
+        async with self._rate_lock:
+            now = time.monotonic()
+            delay = self._next_send_at - now
+            self._next_send_at = max(now, self._next_send_at) + 1 / self.rate_per_second
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _record(self, email_id: int, **values) -> None:
+        async with session_factory() as session:
+            await session.execute(
+                update(EmailOutbox).where(EmailOutbox.id == email_id).values(**values)
+            )
+            await session.commit()
+
+    async def _send(self, email: EmailOutbox) -> None:
+        await self._throttle()
+        started_at = time.perf_counter()
+        try:
+            async with self.pool.connection() as client:
+                await client.send_message(self._build_message(email))
+        except (aiosmtplib.SMTPException, OSError) as exc:
+            if email.attempts >= self.max_attempts:
+                outcome = {'status': EmailStatus.failed}
+                metrics.counter('mail_failed_total').inc()
+                logger.error(
+                    "Giving up on email %s to %s after %s attempts: %s",
+                    email.id,
+                    email.recipient,
+                    email.attempts,
+                    exc,
+                )
+            else:
+                delay = min(self.backoff * 2 ** (email.attempts - 1), self.backoff_max)
+                outcome = {
+                    'next_attempt_at': datetime.now(timezone.utc)
+                    + timedelta(seconds=delay)
+                }
+                metrics.counter('mail_retried_total').inc()
+                logger.warning(
+                    "Email %s failed, retrying in %.0fs: %s", email.id, delay, exc
+                )
+            outcome['last_error'] = str(exc)
+        else:
+            outcome = {
+                'status': EmailStatus.sent,
+                'sent_at': datetime.now(timezone.utc),
+                'last_error': None,
+            }
+            metrics.counter('mail_sent_total').inc()
+        finally:
+            metrics.histogram('mail_send_seconds').observe(
+                time.perf_counter() - started_at
+            )
+        # Recorded on its own, so one email's outcome never depends on the
+        # rest of the batch.
+        await self._record(email.id, **outcome)
+
+    async def _claim(self) -> list[EmailOutbox]:
+        """
+        Lease a batch of due emails by pushing their next attempt past the
+        lease, and count the attempt up front. The transaction only lasts for
+        this statement; an email whose sender dies is retried once the lease
+        runs out.
+        """
+        now = datetime.now(timezone.utc)
+        # SKIP LOCKED lets several dispatchers drain the outbox side by side.
+        due = (
+            select(EmailOutbox.id)
+            .where(
+                EmailOutbox.status == EmailStatus.pending,
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with session_factory(expire_on_commit=False) as session:
+            result = await session.scalars(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(
+                    next_attempt_at=now + timedelta(seconds=self.lease),
+                    attempts=EmailOutbox.attempts + 1,
+                )
+                .returning(EmailOutbox)
+                .execution_options(synchronize_session=False)
+            )
+            emails = result.all()
+            await session.commit()
+        return emails
+
+    async def dispatch_batch(self) -> int:
+        emails = await self._claim()
+        if not emails:
+            return 0
+
+        results = await asyncio.gather(
+            *(self._send(email) for email in emails), return_exceptions=True
+        )
+        for email, result in zip(emails, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Dispatching email %s failed; retrying after its lease",
+                    email.id,
+                    exc_info=result,
+                )
+
+        metrics.histogram('mail_batch_size').observe(len(emails))
+        return len(emails)
+
+    async def drain(self) -> None:
+        while await self.dispatch_batch() == self.batch_size:
+            pass
+
+    async def run_forever(self, poll_interval: float) -> None:
+        logger.info("Mail dispatcher started")
+        try:
+            while True:
+                try:
+                    await self.drain()
+                except Exception:
+                    logger.exception("Mail dispatch failed")
+                await asyncio.sleep(poll_interval)
+        finally:
+            await self.pool.close()
+
+
+mail_dispatcher = MailDispatcher(
+    pool=SMTPConnectionPool(size=settings.MAIL_POOL_SIZE),
+    batch_size=settings.MAIL_BATCH_SIZE,
+    rate_per_second=settings.MAIL_RATE_PER_SECOND,
+    max_attempts=settings.MAIL_MAX_ATTEMPTS,
+    backoff=settings.MAIL_RETRY_BACKOFF_SECONDS,
+    backoff_max=settings.MAIL_RETRY_BACKOFF_MAX_SECONDS,
+    lease=settings.MAIL_LEASE_SECONDS,
+)
+
+
+if __name__ == '__main__':
+    from src.apps.friends.models import FriendRequest  # noqa
+    from src.apps.posts.models import PostModel  # noqa
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+    asyncio.run(mail_dispatcher.run_forever(settings.MAIL_POLL_SECONDS))
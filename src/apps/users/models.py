@@ -1,6 +1,23 @@
+import enum
+import hashlib
+import re
+from datetime import datetime
 from typing import Annotated
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    false,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.databases import Base
@@ -10,6 +27,20 @@ int_pk = Annotated[int, mapped_column(Integer, primary_key=True, index=True)]
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_email_trgm",
+            text("email gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_users_username_trgm",
+            text("username gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+        Index("ix_users_email_lower_prefix", text('lower(email) COLLATE "C"')),
+        Index("ix_users_username_lower_prefix", text('lower(username) COLLATE "C"')),
+    )
 
     id: Mapped[int_pk]
     first_name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -23,9 +54,24 @@ class User(Base):
     username: Mapped[str | None] = mapped_column(
         String(255), unique=True, index=True, nullable=True
     )
+    # sha256 of the normalized email / phone number, used for contact discovery
+    email_hash: Mapped[str | None] = mapped_column(
+        String(64), index=True, nullable=True
+    )
+    phone_hash: Mapped[str | None] = mapped_column(
+        String(64), index=True, nullable=True
+    )
     hashed_password: Mapped[str | None] = mapped_column(String, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     email_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Sticky: the author's posts are merged into feeds on read, not fanned out
+    timeline_fanout_on_read: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false(), nullable=False
+    )
+    # Set on soft delete; the row is purged by the account deletion job
+    deleted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
 
     # OAuth identifiers
     google_id: Mapped[str | None] = mapped_column(
@@ -55,14 +101,106 @@ class User(Base):
     )
 
 
+def contact_hash(value: str | None) -> str | None:
+    return hashlib.sha256(value.encode()).hexdigest() if value else None
+
+
+def normalize_email(email: str | None) -> str | None:
+    return email.strip().lower() if email else None
+
+
+def normalize_phone_number(phone_number: str | None) -> str | None:
+    return re.sub(r"\D", "", phone_number) if phone_number else None
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def set_contact_hashes(mapper, connection, user: User) -> None:
+    user.email_hash = contact_hash(normalize_email(user.email))
+    user.phone_hash = contact_hash(normalize_phone_number(user.phone_number))
+
+
 class RevokedToken(Base):
     __tablename__ = "revoked_tokens"
 
     id: Mapped[int_pk]
     jti: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
-    expires_at: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
+    # Wall-clock insert time rather than now() (transaction start), so the
+    # sync window only has to cover the gap between insert and commit.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.clock_timestamp(),
+        index=True,
+        nullable=False,
+    )
 
     user = relationship("User", back_populates="revoked_tokens")
+
+
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int_pk]
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[EmailStatus] = mapped_column(
+        Enum(EmailStatus), default=EmailStatus.pending, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class AccountDeletionStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class AccountDeletionJob(Base):
+    __tablename__ = "account_deletion_jobs"
+
+    id: Mapped[int_pk]
+    # No foreign key: the job outlives the user row it purges
+    user_id: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+    status: Mapped[AccountDeletionStatus] = mapped_column(
+        Enum(AccountDeletionStatus),
+        default=AccountDeletionStatus.pending,
+        nullable=False,
+    )
+    stage: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    deleted_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    locked_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    completed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
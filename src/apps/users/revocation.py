@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.users.models import RevokedToken
+from src.databases import session_factory
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BloomFilter:
+    capacity: int
+    error_rate: float
+    size: int = field(init=False)
+    hash_count: int = field(init=False)
+    bits: bytearray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.size = math.ceil(
+            -self.capacity * math.log(self.error_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+@dataclass
+class TokenRevocationRegistry:
+    capacity: int
+    error_rate: float
+    # How far back each sync looks past the previous one, to pick up rows
+    # inserted before it but committed after it.
+    sync_overlap: float
+    _filter: BloomFilter = field(init=False, repr=False)
+    _synced_at: datetime | None = field(default=None, init=False)
+
+    def __post_init__(self):
+        self._filter = BloomFilter(capacity=self.capacity, error_rate=self.error_rate)
+
+    async def load(self, session: AsyncSession) -> None:
+        synced_at = await session.scalar(select(func.clock_timestamp()))
+        result = await session.execute(
+            select(RevokedToken.jti).where(RevokedToken.expires_at >= int(time.time()))
+        )
+        jtis = result.scalars().all()
+
+        bloom_filter = BloomFilter(
+            capacity=max(self.capacity, 2 * len(jtis)), error_rate=self.error_rate
+        )
+        for jti in jtis:
+            bloom_filter.add(jti)
+
+        self._filter = bloom_filter
+        self._synced_at = synced_at
+        metrics.gauge('revoked_tokens_filter_size').set(len(jtis))
+        logger.info("Loaded %s revoked tokens into the revocation filter", len(jtis))
+
+    async def sync(self, session: AsyncSession) -> None:
+        if self._synced_at is None:
+            await self.load(session)
+            return
+
+        # Ids and timestamps are taken at insert time, not at commit time, so
+        # a plain watermark would miss revocations committed late. Re-reading
+        # an overlapping window is harmless since adding a jti is idempotent.
+        synced_at = await session.scalar(select(func.clock_timestamp()))
+        result = await session.execute(
+            select(RevokedToken.jti).where(
+                RevokedToken.created_at
+                >= self._synced_at - timedelta(seconds=self.sync_overlap)
+            )
+        )
+        for jti in result.scalars().all():
+            if jti not in self._filter:
+                self._filter.add(jti)
+                metrics.gauge('revoked_tokens_filter_size').inc()
+        self._synced_at = synced_at
+
+    async def revoke(
+        self, session: AsyncSession, jti: str, user_id: int, expires_at: int
+    ) -> None:
+        logger.info("Revoking token '%s' of user with id '%s'", jti, user_id)
+        await session.execute(
+            insert(RevokedToken)
+            .values(jti=jti, user_id=user_id, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        self._filter.add(jti)
+
+    async def is_revoked(self, session: AsyncSession, jti: str) -> bool:
+        if jti not in self._filter:
+            metrics.counter('revoked_tokens_checks_total', result='filtered').inc()
+            return False
+
+        result = await session.execute(
+            select(RevokedToken.id).where(RevokedToken.jti == jti)
+        )
+        is_revoked = result.first() is not None
+        metrics.counter(
+            'revoked_tokens_checks_total',
+            result='revoked' if is_revoked else 'false_positive',
+        ).inc()
+        return is_revoked
+
+    async def purge_expired(self, session: AsyncSession) -> int:
+        result = await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at < int(time.time()))
+        )
+        await session.commit()
+
+        if result.rowcount:
+            logger.info("Purged %s expired revoked tokens", result.rowcount)
+            metrics.counter('revoked_tokens_purged_total').inc(result.rowcount)
+        # Rebuild regardless, which drops expired jtis and backstops anything
+        # a sync could have missed.
+        await self.load(session)
+
+        return result.rowcount
+
+
+token_revocation = TokenRevocationRegistry(
+    capacity=settings.REVOKED_TOKENS_FILTER_CAPACITY,
+    error_rate=settings.REVOKED_TOKENS_FILTER_ERROR_RATE,
+    sync_overlap=settings.REVOKED_TOKENS_SYNC_OVERLAP_SECONDS,
+)
+
+
+async def load_revoked_tokens() -> None:
+    async with session_factory() as session:
+        await token_revocation.load(session)
+
+
+async def sync_revoked_tokens() -> None:
+    async with session_factory() as session:
+        await token_revocation.sync(session)
+
+
+async def purge_expired_revoked_tokens() -> None:
+    async with session_factory() as session:
+        await token_revocation.purge_expired(session)
@@ -3,7 +3,6 @@ from datetime import timedelta
 from authlib.integrations.starlette_client import OAuth
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     HTTPException,
     Request,
@@ -13,7 +12,9 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.apps.users.models import RevokedToken, User
+from src.apps.users.cache import get_active_user_principal, user_principal_cache
+from src.apps.users.models import User
+from src.apps.users.revocation import token_revocation
 from src.apps.users.schemas import (
     EmailSchema,
     PasswordResetConfirm,
@@ -21,6 +22,7 @@ from src.apps.users.schemas import (
     TokenRefresh,
     UserCreate,
     UserOut,
+    UserPrincipal,
 )
 from src.apps.users.security import (
     _create_token,
@@ -29,8 +31,9 @@ from src.apps.users.security import (
     decode_token,
     get_or_create_user,
     hash_password,
-    verify_password,
+    verify_and_update_password,
 )
+from src.apps.users.throttling import auth_rate_limiter
 from src.apps.users.utils import send_email, send_generic_email
 from src.databases import get_async_db
 from src.settings.config import settings
@@ -42,20 +45,27 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/lo
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_async_db),
-) -> User:
+) -> UserPrincipal:
     try:
         payload = decode_token(token)
         if payload.get("type") != "access":
             raise ValueError()
         user_id = int(payload["sub"])
+        jti = payload["jti"]
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = await session.get(User, user_id)
-    if not user or not user.is_active:
+    if await token_revocation.is_revoked(session, jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = await get_active_user_principal(session, user_id)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Inactive user",
@@ -67,10 +77,14 @@ async def get_current_user(
     "/register", response_model=UserOut, status_code=status.HTTP_201_CREATED
 )
 async def register(
+    request: Request,
     data: UserCreate,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_db),
 ):
+    await auth_rate_limiter.check(
+        "register", request, data.email or data.phone_number or data.username
+    )
+
     if not any([data.email, data.phone_number, data.username]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -105,19 +119,21 @@ async def register(
         email=data.email,
         phone_number=data.phone_number,
         username=data.username,
-        hashed_password=hash_password(data.password),
+        hashed_password=await hash_password(data.password),
         is_active=True,
         email_verified=False,
     )
     session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    await session.flush()
 
     if data.email:
         token = _create_token(
             subject=user.id, token_type="verify", expires_delta=timedelta(hours=24)
         )
-        background_tasks.add_task(send_email, user.email, token)
+        await send_email(session, user.email, token)
+
+    await session.commit()
+    await session.refresh(user)
     return user
 
 
@@ -147,15 +163,19 @@ async def verify_email(
 
     user.email_verified = True
     await session.commit()
+    user_principal_cache.invalidate(user.id)
     return {"message": "Email verified successfully"}
 
 
 @auth_router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_async_db),
 ):
     identifier = form.username
+    await auth_rate_limiter.check("login", request, identifier)
+
     q = select(User).where(
         or_(
             User.email == identifier,
@@ -164,12 +184,19 @@ async def login(
         )
     )
     user = (await session.execute(q)).scalars().first()
-    if not user or not verify_password(form.password, user.hashed_password):
+    is_valid, new_hash = await verify_and_update_password(
+        form.password, user.hashed_password if user else None
+    )
+    if not user or not is_valid or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Hash was produced with outdated cost parameters
+        user.hashed_password = new_hash
+        await session.commit()
     if not user.email_verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email not verified"
@@ -199,8 +226,7 @@ async def refresh_token(
             detail="Invalid refresh token",
         )
 
-    result = await session.execute(select(RevokedToken).where(RevokedToken.jti == jti))
-    if result.scalars().first():
+    if await token_revocation.is_revoked(session, jti):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
@@ -223,12 +249,43 @@ async def refresh_token(
     }
 
 
+@auth_router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(
+    payload: TokenRefresh,
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_db),
+):
+    try:
+        access = decode_token(token)
+        refresh = decode_token(payload.refresh_token)
+        if access.get("type") != "access" or refresh.get("type") != "refresh":
+            raise ValueError()
+        if access["sub"] != refresh["sub"]:
+            raise ValueError("Tokens belong to different users")
+        user_id = int(access["sub"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid tokens",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    for data in (access, refresh):
+        await token_revocation.revoke(
+            session, jti=data["jti"], user_id=user_id, expires_at=data["exp"]
+        )
+    await session.commit()
+    return {"message": "Successfully logged out"}
+
+
 @auth_router.post("/password-reset", status_code=status.HTTP_202_ACCEPTED)
 async def password_reset_request(
+    request: Request,
     data: EmailSchema,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_db),
 ):
+    await auth_rate_limiter.check("password_reset", request, data.email)
+
     q = select(User).where(User.email == data.email)
     user = (await session.execute(q)).scalars().first()
     if not user:
@@ -244,12 +301,13 @@ async def password_reset_request(
         expires_delta=timedelta(hours=1),
     )
     link = f"{token}"
-    background_tasks.add_task(
-        send_generic_email,
+    await send_generic_email(
+        session,
         user.email,
         "Password Reset",
         f"Your token for password reset:\n\n{link}",
     )
+    await session.commit()
     return {
         "message": "If that email is registered, you will receive reset instructions."
     }
@@ -257,9 +315,12 @@ async def password_reset_request(
 
 @auth_router.post("/password-reset/confirm", status_code=status.HTTP_200_OK)
 async def password_reset_confirm(
+    request: Request,
     data: PasswordResetConfirm,
     session: AsyncSession = Depends(get_async_db),
 ):
+    await auth_rate_limiter.check("password_reset_confirm", request)
+
     try:
         payload = decode_token(data.token)
         if payload.get("type") != "reset":
@@ -277,7 +338,7 @@ async def password_reset_confirm(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    user.hashed_password = hash_password(data.new_password)
+    user.hashed_password = await hash_password(data.new_password)
     await session.commit()
     return {"message": "Password has been reset successfully."}
 
@@ -1,50 +1,147 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.apps.users.cache import get_active_user_principal, user_principal_cache
+from src.apps.users.contacts import match_contacts
+from src.apps.users.deletion import schedule_account_deletion
+from src.apps.users.dependencies import UserLoaderDep
 from src.apps.users.models import User
 from src.apps.users.routers.auth import get_current_user
-from src.apps.users.schemas import UserOut, UserUpdate
-from src.databases import get_async_db
+from src.apps.users.schemas import (
+    AccountDeletionOut,
+    ContactMatchRequest,
+    ContactMatchResponse,
+    UserOut,
+    UserPage,
+    UserPrincipal,
+    UserUpdate,
+)
+from src.apps.users.search import (
+    autocomplete_users,
+    search_users_query,
+    user_out_columns,
+)
+from src.apps.users.throttling import auth_rate_limiter
+from src.databases import get_async_db, session_factory
 
 users_router = APIRouter()
 
+STREAM_BATCH_SIZE = 1000
+MAX_BATCH_IDS = 100
+
+
+def _active_users_after(after_id: int):
+    return (
+        select(*user_out_columns)
+        .where(User.is_active == True, User.id > after_id)
+        .order_by(User.id)
+    )
+
+
+async def _stream_users(after_id: int):
+    # Власна сесія: відповідь стрімиться вже після закриття залежностей запиту.
+    async with session_factory() as session:
+        query = _active_users_after(after_id).execution_options(
+            yield_per=STREAM_BATCH_SIZE
+        )
+        result = await session.stream(query)
+        async for rows in result.mappings().partitions():
+            yield "".join(
+                UserOut.model_validate(dict(row)).model_dump_json() + "\n"
+                for row in rows
+            )
+
 
 # ─── Отримати список усіх активних користувачів ────────────────────────────────
-@users_router.get("/", response_model=List[UserOut])
+@users_router.get("/", response_model=UserPage)
 async def list_users(
+    loader: UserLoaderDep,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    stream: bool = False,
+    ids: Optional[List[int]] = Query(None, max_length=MAX_BATCH_IDS),
     session: AsyncSession = Depends(get_async_db),
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
     """
-    Повертає список усіх користувачів (тільки якщо поточний користувач авторизований).
-    Можна додатково фільтрувати, пагінувати тощо.
+    Повертає сторінку активних користувачів, впорядкованих за id.
+    Наступну сторінку запитують з after_id=next_cursor.
+    З stream=true віддає всіх користувачів після after_id як NDJSON.
+    З ids=1&ids=2... повертає лише цих користувачів (одним запитом, у
+    порядку ids; неактивні та неіснуючі пропускаються).
     """
-    q = select(User).where(User.is_active == True)
-    result = await session.execute(q)
-    users = result.scalars().all()
-    return users
+    if ids:
+        users = await loader.load_many(dict.fromkeys(ids))
+        return {
+            "items": [UserOut.model_validate(user) for user in users if user],
+            "next_cursor": None,
+        }
+
+    if stream:
+        return StreamingResponse(
+            _stream_users(after_id), media_type="application/x-ndjson"
+        )
+
+    result = await session.execute(_active_users_after(after_id).limit(limit))
+    rows = result.mappings().all()
+    return {
+        "items": rows,
+        "next_cursor": rows[-1]["id"] if len(rows) == limit else None,
+    }
 
 
 # ─── Отримати профіль поточного користувача ──────────────────────────────────────
 @users_router.get("/me", response_model=UserOut)
 async def read_own_profile(
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
     return current
 
 
+# ─── Автодоповнення для пошуку людей ─────────────────────────────────────────────
+@users_router.get("/autocomplete", response_model=List[UserOut])
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(10, ge=1, le=20),
+    session: AsyncSession = Depends(get_async_db),
+    current: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Спочатку збіги за префіксом username, потім email, потім за підрядком
+    (від 3 символів, через триграмні індекси).
+    """
+    return await autocomplete_users(session, q, limit)
+
+
+# ─── Пошук знайомих за контактами з адресної книги ───────────────────────────────
+@users_router.post("/contacts/match", response_model=ContactMatchResponse)
+async def contacts_match(
+    request: Request,
+    data: ContactMatchRequest,
+    session: AsyncSession = Depends(get_async_db),
+    current: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Приймає sha256-хеші email та номерів телефонів і повертає зареєстрованих
+    користувачів, чиї контакти збіглися.
+    """
+    await auth_rate_limiter.check("contacts_match", request, str(current.id))
+    return {"matches": await match_contacts(session, data, current.id)}
+
+
 # ─── Отримати профіль будь-якого користувача за ID ───────────────────────────────
 @users_router.get("/{user_id}", response_model=UserOut)
 async def read_user_by_id(
     user_id: int,
     session: AsyncSession = Depends(get_async_db),
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
-    user = await session.get(User, user_id)
-    if not user or not user.is_active:
+    user = await get_active_user_principal(session, user_id)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
@@ -56,7 +153,7 @@ async def read_user_by_id(
 async def update_own_profile(
     data: UserUpdate,
     session: AsyncSession = Depends(get_async_db),
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
     """
     Відповідь: користувач може оновити своє first_name, last_name, phone_number тощо,
@@ -70,32 +167,43 @@ async def update_own_profile(
     #     username: Optional[str]
     #     ...
     #
+    user = await session.get(User, current.id)
     update_data = data.dict(exclude_unset=True)
     for field, value in update_data.items():
-        setattr(current, field, value)
+        setattr(user, field, value)
 
-    session.add(current)
     await session.commit()
-    await session.refresh(current)
-    return current
+    await session.refresh(user)
+    user_principal_cache.invalidate(user.id)
+    return user
 
 
 # ─── Видалити власний акаунт ─────────────────────────────────────────────────────
-@users_router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+@users_router.delete(
+    "/me", response_model=AccountDeletionOut, status_code=status.HTTP_202_ACCEPTED
+)
 async def delete_own_account(
     session: AsyncSession = Depends(get_async_db),
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
-    await session.delete(current)
-    await session.commit()
+    """
+    Деактивує акаунт одразу; дані в Postgres і MongoDB видаляє фонова задача.
+    """
+    user = await session.get(User, current.id)
+    job = await schedule_account_deletion(session, user)
+    return {"job_id": job.id, "status": job.status}
 
 
 # ─── Видалити користувача за ID (тільки адміністратор) ───────────────────────────
-@users_router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@users_router.delete(
+    "/{user_id}",
+    response_model=AccountDeletionOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def delete_user_by_id(
     user_id: int,
     session: AsyncSession = Depends(get_async_db),
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
     # Припустимо, є поле current.is_superuser або current.is_admin, яке перевіряємо
     if not current.is_superuser:
@@ -103,12 +211,12 @@ async def delete_user_by_id(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
     user = await session.get(User, user_id)
-    if not user:
+    if not user or user.deleted_at:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    await session.delete(user)
-    await session.commit()
+    job = await schedule_account_deletion(session, user)
+    return {"job_id": job.id, "status": job.status}
 
 
 # ─── Пошук користувача за email або username ─────────────────────────────────────
@@ -116,17 +224,13 @@ async def delete_user_by_id(
 async def search_users(
     email: Optional[str] = None,
     username: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
     session: AsyncSession = Depends(get_async_db),
-    current: User = Depends(get_current_user),
+    current: UserPrincipal = Depends(get_current_user),
 ):
     if not email and not username:
         raise HTTPException(
             status_code=400, detail="Provide email or username to search"
         )
-    stmt = select(User)
-    if email:
-        stmt = stmt.where(User.email.ilike(f"%{email}%"))
-    if username:
-        stmt = stmt.where(User.username.ilike(f"%{username}%"))
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    result = await session.execute(search_users_query(email, username, limit))
+    return result.mappings().all()
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, StringConstraints
 
 
 class UserCreate(BaseModel):
@@ -28,6 +28,24 @@ class UserOut(BaseModel):
         orm_mode = True
 
 
+class UserPage(BaseModel):
+    items: list[UserOut]
+    next_cursor: Optional[int] = None
+
+
+class UserPrincipal(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: Optional[str]
+    phone_number: Optional[str]
+    username: Optional[str]
+    email_verified: bool
+    is_active: bool
+
+    model_config = {"from_attributes": True, "frozen": True}
+
+
 class UserUpdate(BaseModel):
     first_name: Optional[str]
     last_name: Optional[str]
@@ -55,3 +73,32 @@ class EmailSchema(BaseModel):
 class PasswordResetConfirm(BaseModel):
     token: str
     new_password: str
+
+
+ContactHash = Annotated[
+    str, StringConstraints(pattern=r"^[0-9a-fA-F]{64}$", to_lower=True)
+]
+
+
+class ContactMatchRequest(BaseModel):
+    """
+    sha256 (hex) of the normalized contacts: lowercased email and phone number
+    digits only (with country code).
+    """
+
+    email_hashes: list[ContactHash] = Field(default_factory=list, max_length=5000)
+    phone_hashes: list[ContactHash] = Field(default_factory=list, max_length=5000)
+
+
+class ContactMatch(BaseModel):
+    hash: str
+    user: UserOut
+
+
+class ContactMatchResponse(BaseModel):
+    matches: list[ContactMatch]
+
+
+class AccountDeletionOut(BaseModel):
+    job_id: int
+    status: str
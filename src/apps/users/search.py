@@ -0,0 +1,95 @@
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.users.models import User
+from src.apps.users.schemas import UserOut
+from src.cache import TTLCache
+from src.metrics import metrics
+from src.settings.config import settings
+
+# Trigram indexes only help once the term has a full trigram in it.
+MIN_SUBSTRING_LENGTH = 3
+
+user_out_columns = [getattr(User, name) for name in UserOut.model_fields]
+
+autocomplete_cache: TTLCache[tuple[str, int], list[UserOut]] = TTLCache(
+    ttl=settings.USER_SEARCH_CACHE_TTL_SECONDS,
+    max_size=settings.USER_SEARCH_CACHE_MAX_SIZE,
+)
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.split()).lower()
+
+
+def _active(query, exclude_ids: list[int]):
+    query = query.where(User.is_active == True)
+    if exclude_ids:
+        query = query.where(User.id.not_in(exclude_ids))
+    return query
+
+
+def _prefix_query(column, term: str, limit: int, exclude_ids: list[int]):
+    # A range on the indexed lower(...) COLLATE "C" expression stays sargable
+    # with bound parameters (unlike LIKE), and ordering by the same expression
+    # lets the scan stop after `limit` rows.
+    key = func.lower(column).collate("C")
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    query = select(*user_out_columns).where(key >= term, key < upper)
+    return _active(query, exclude_ids).order_by(key, User.id).limit(limit)
+
+
+def _substring_query(term: str, limit: int, exclude_ids: list[int]):
+    pattern = "%" + escape_like(term) + "%"
+    score = func.greatest(
+        func.coalesce(func.similarity(User.username, literal(term)), 0),
+        func.coalesce(func.similarity(User.email, literal(term)), 0),
+    )
+    query = select(*user_out_columns).where(
+        or_(User.username.ilike(pattern), User.email.ilike(pattern))
+    )
+    return _active(query, exclude_ids).order_by(score.desc(), User.id).limit(limit)
+
+
+async def autocomplete_users(
+    session: AsyncSession, term: str, limit: int
+) -> list[UserOut]:
+    term = normalize_term(term)
+    key = (term, limit)
+
+    cached = autocomplete_cache.get(key)
+    if cached is not None:
+        metrics.counter("user_autocomplete_cache_total", result="hit").inc()
+        return cached
+    metrics.counter("user_autocomplete_cache_total", result="miss").inc()
+
+    # Ranked phases: username prefix, email prefix, then substring matches.
+    phases = [
+        lambda n, ids: _prefix_query(User.username, term, n, ids),
+        lambda n, ids: _prefix_query(User.email, term, n, ids),
+    ]
+    if len(term) >= MIN_SUBSTRING_LENGTH:
+        phases.append(lambda n, ids: _substring_query(term, n, ids))
+
+    rows = []
+    for build_query in phases:
+        if len(rows) >= limit:
+            break
+        query = build_query(limit - len(rows), [row["id"] for row in rows])
+        rows += (await session.execute(query)).mappings().all()
+
+    users = [UserOut.model_validate(dict(row)) for row in rows]
+    return autocomplete_cache.set(key, users)
+
+
+def search_users_query(email: str | None, username: str | None, limit: int):
+    query = select(*user_out_columns).where(User.is_active == True)
+    if email:
+        query = query.where(User.email.ilike(f"%{escape_like(email)}%"))
+    if username:
+        query = query.where(User.username.ilike(f"%{escape_like(username)}%"))
+    return query.order_by(User.id).limit(limit)
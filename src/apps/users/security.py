@@ -1,6 +1,10 @@
+import asyncio
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -8,17 +12,81 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.apps.users.models import User
+from src.metrics import metrics
 from src.settings.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
 
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
 
+@dataclass
+class PasswordHasher:
+    context: CryptContext
+    max_workers: int
+    max_concurrency: int
+    _executor: ThreadPoolExecutor = field(init=False, repr=False)
+    _semaphore: asyncio.Semaphore = field(init=False, repr=False)
 
-def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    def __post_init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="password-hasher"
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _run(self, operation: str, func: Callable[..., T], *args) -> T:
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            started_at = time.perf_counter()
+            metrics.histogram(
+                "password_hash_queue_seconds", operation=operation
+            ).observe(started_at - queued_at)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._executor, func, *args)
+            finally:
+                metrics.histogram("password_hash_seconds", operation=operation).observe(
+                    time.perf_counter() - started_at
+                )
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str | None) -> bool:
+        return await self._run("verify", self.context.verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str | None
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            "verify", self.context.verify_and_update, password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    context=pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, hashed_password: str | None) -> bool:
+    return await password_hasher.verify(password, hashed_password)
+
+
+async def verify_and_update_password(
+    password: str, hashed_password: str | None
+) -> tuple[bool, str | None]:
+    return await password_hasher.verify_and_update(password, hashed_password)
 
 
 def _create_token(
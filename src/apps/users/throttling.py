@@ -0,0 +1,130 @@
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from beanie import Document
+from fastapi import Request
+from pymongo import IndexModel, ReturnDocument
+
+from src.apps.users.exceptions import TooManyRequestsException
+from src.cache import TTLCache
+from src.metrics import metrics
+from src.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitCounterModel(Document):
+    id: str
+    hits: int
+    expires_at: datetime
+
+    class Settings:
+        name = "rate_limit_counters"
+        indexes = [IndexModel("expires_at", expireAfterSeconds=0)]
+
+
+class BaseRateLimitBackend(ABC):
+    @abstractmethod
+    async def increment(
+        self, key: str, window_id: int, window: float
+    ) -> tuple[int, int]:
+        """Count a hit in window ``window_id`` and return (previous, current)."""
+
+
+@dataclass
+class InMemoryRateLimitBackend(BaseRateLimitBackend):
+    max_keys: int
+    _counters: TTLCache[str, dict[int, int]] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._counters = TTLCache(ttl=0, max_size=self.max_keys)
+
+    async def increment(
+        self, key: str, window_id: int, window: float
+    ) -> tuple[int, int]:
+        counters = self._counters.get(key) or {}
+        counters = {
+            window_id - 1: counters.get(window_id - 1, 0),
+            window_id: counters.get(window_id, 0) + 1,
+        }
+        self._counters.set(key, counters, ttl=2 * window)
+        return counters[window_id - 1], counters[window_id]
+
+
+class MongoRateLimitBackend(BaseRateLimitBackend):
+    async def increment(
+        self, key: str, window_id: int, window: float
+    ) -> tuple[int, int]:
+        collection = RateLimitCounterModel.get_motor_collection()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=2 * window)
+
+        current = await collection.find_one_and_update(
+            {"_id": f"{key}:{window_id}"},
+            {"$inc": {"hits": 1}, "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        previous = await collection.find_one({"_id": f"{key}:{window_id - 1}"})
+        return (previous["hits"] if previous else 0), current["hits"]
+
+
+@dataclass
+class RateLimiter:
+    backend: BaseRateLimitBackend
+    window: float
+    identifier_limit: int
+    ip_limit: int
+
+    async def _hit(self, scope: str, kind: str, key: str, limit: int) -> float | None:
+        now = time.time()
+        window_id = int(now // self.window)
+        elapsed = now / self.window - window_id
+
+        previous, current = await self.backend.increment(
+            f"{scope}:{kind}:{key}", window_id, self.window
+        )
+        # Sliding window estimate: weight the previous window by its overlap.
+        if previous * (1 - elapsed) + current <= limit:
+            return None
+
+        metrics.counter("auth_rate_limit_rejected_total", scope=scope, key=kind).inc()
+        return (1 - elapsed) * self.window
+
+    async def check(self, scope: str, request: Request, identifier: str | None = None):
+        metrics.counter("auth_rate_limit_checks_total", scope=scope).inc()
+
+        keys = [
+            ("ip", request.client.host if request.client else "unknown", self.ip_limit)
+        ]
+        if identifier:
+            keys.append(
+                ("identifier", identifier.strip().lower(), self.identifier_limit)
+            )
+
+        delays = {}
+        for kind, key, limit in keys:
+            delay = await self._hit(scope, kind, key, limit)
+            if delay is not None:
+                delays[kind] = delay
+
+        if delays:
+            logger.warning("Rate limit exceeded for %s by %s", scope, ", ".join(delays))
+            raise TooManyRequestsException(retry_after=math.ceil(max(delays.values())))
+
+
+def get_rate_limit_backend() -> BaseRateLimitBackend:
+    if settings.AUTH_RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimitBackend()
+    return InMemoryRateLimitBackend(max_keys=settings.AUTH_RATE_LIMIT_MAX_KEYS)
+
+
+auth_rate_limiter = RateLimiter(
+    backend=get_rate_limit_backend(),
+    window=settings.AUTH_RATE_LIMIT_WINDOW_SECONDS,
+    identifier_limit=settings.AUTH_RATE_LIMIT_PER_IDENTIFIER,
+    ip_limit=settings.AUTH_RATE_LIMIT_PER_IP,
+)
@@ -1,46 +1,28 @@
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.settings.config import settings
+from src.apps.users.models import EmailOutbox
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
 
-
-async def send_email(email_to: EmailStr, token: str):
-    message = MessageSchema(
+async def send_email(session: AsyncSession, email_to: EmailStr, token: str):
+    await send_generic_email(
+        session,
+        email_to,
         subject="🛡 Підтвердження Email на SmartMessenger",
-        recipients=[email_to],
         body=(
             f"Вставте цей токен у поле верифікації:\n\n"
             f"{token}\n\n"
             f"Це посилання дійсне 24 години.\n\n"
             f"Якщо ви не реєструвалися на SmartMessenger — просто проігноруйте цей лист."
         ),
-        subtype="plain",
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
 
 
-async def send_generic_email(email_to: EmailStr, subject: str, body: str):
+async def send_generic_email(
+    session: AsyncSession, email_to: EmailStr, subject: str, body: str
+):
     """
-    Відправляє лист на будь-яку тему з будь-яким тілом.
+    Ставить лист у чергу на відправку (email_outbox) в поточній транзакції.
+    Доставляє його MailDispatcher, коли транзакцію буде закомічено.
     """
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email_to],
-        body=body,
-        subtype="plain",
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    session.add(EmailOutbox(recipient=email_to, subject=subject, body=body))
@@ -0,0 +1,71 @@
+import logging
+import time
+from dataclasses import dataclass, field
+
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, or straight away
+    when the upstream tells us to back off, and fails calls fast until
+    `reset_timeout` has passed. Then one trial call is let through; its
+    outcome closes the breaker again or reopens it.
+    """
+
+    name: str
+    failure_threshold: int
+    reset_timeout: float
+    _failures: int = field(default=0, init=False)
+    _opened_until: float = field(default=0.0, init=False)
+    _trial_in_progress: bool = field(default=False, init=False)
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_until > 0
+
+    def allow(self) -> bool:
+        if not self.is_open:
+            return True
+        if time.monotonic() < self._opened_until or self._trial_in_progress:
+            metrics.counter('circuit_breaker_rejected_total', breaker=self.name).inc()
+            return False
+        self._trial_in_progress = True
+        return True
+
+    def record_success(self) -> None:
+        if self.is_open:
+            logger.info("Circuit breaker '%s' closed", self.name)
+            metrics.gauge('circuit_breaker_open', breaker=self.name).set(0)
+        self._failures = 0
+        self._opened_until = 0.0
+        self._trial_in_progress = False
+
+    def release(self) -> None:
+        """
+        End a call that says nothing about the upstream's health (it was
+        cancelled, or rejected as a bad request), so a trial slot it held is
+        freed for the next caller.
+        """
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_progress or self._failures >= self.failure_threshold:
+            self.open()
+
+    def open(self, duration: float | None = None) -> None:
+        duration = max(duration or 0, self.reset_timeout)
+        self._opened_until = time.monotonic() + duration
+        self._trial_in_progress = False
+        metrics.counter('circuit_breaker_opened_total', breaker=self.name).inc()
+        metrics.gauge('circuit_breaker_open', breaker=self.name).set(1)
+        logger.warning(
+            "Circuit breaker '%s' opened for %.0fs after %s failures",
+            self.name,
+            duration,
+            self._failures,
+        )
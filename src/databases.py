@@ -7,14 +7,26 @@ from src.settings.config import settings
 
 
 async def init_mongo(client: AsyncIOMotorClient = None):
-    from src.apps.chats.models import ChatModel, ChatPermissionsModel, MessageModel
+    from src.apps.chats.models import (
+        ChatModel,
+        ChatPermissionsModel,
+        ChatSummaryModel,
+        MessageModel,
+    )
+    from src.apps.users.throttling import RateLimitCounterModel
 
     if not client:
         client = AsyncIOMotorClient(settings.MONGODB_URL)
 
     await init_beanie(
         database=client[settings.MONGODB_DB],
-        document_models=[ChatModel, MessageModel, ChatPermissionsModel],
+        document_models=[
+            ChatModel,
+            MessageModel,
+            ChatPermissionsModel,
+            ChatSummaryModel,
+            RateLimitCounterModel,
+        ],
     )
 
     return client
@@ -10,9 +10,20 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 
-from src.apps.friends.models import FriendRequest  # noqa
-from src.apps.posts.models import CommentModel, LikeModel, PostModel  # noqa
-from src.apps.users.models import RevokedToken, User  # noqa
+from src.apps.friends.models import FriendRequest, Friendship  # noqa
+from src.apps.posts.models import (  # noqa
+    CommentModel,
+    LikeModel,
+    PostModel,
+    PostScore,
+    TimelineEntry,
+)
+from src.apps.users.models import (  # noqa
+    AccountDeletionJob,
+    EmailOutbox,
+    RevokedToken,
+    User,
+)
 from src.databases import Base
 from src.settings.config import settings
 
@@ -0,0 +1,57 @@
+"""user search trigram and prefix indexes
+
+Revision ID: c2b9f6e1d4a8
+Revises: a7d4e2c8f913
+Create Date: 2026-10-18 16:40:03.771520
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2b9f6e1d4a8'
+down_revision: Union[str, None] = 'a7d4e2c8f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_users_email_trgm',
+        'users',
+        [sa.text('email gin_trgm_ops')],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_users_username_trgm',
+        'users',
+        [sa.text('username gin_trgm_ops')],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_users_email_lower_prefix',
+        'users',
+        [sa.text('lower(email) COLLATE "C"')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_users_username_lower_prefix',
+        'users',
+        [sa.text('lower(username) COLLATE "C"')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_username_lower_prefix', table_name='users')
+    op.drop_index('ix_users_email_lower_prefix', table_name='users')
+    op.drop_index('ix_users_username_trgm', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
@@ -0,0 +1,51 @@
+"""user contact hashes
+
+Revision ID: d5e8a3b7c6f2
+Revises: c2b9f6e1d4a8
+Create Date: 2026-10-18 18:22:47.915304
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a3b7c6f2'
+down_revision: Union[str, None] = 'c2b9f6e1d4a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('email_hash', sa.String(length=64), nullable=True))
+    op.add_column('users', sa.Column('phone_hash', sa.String(length=64), nullable=True))
+
+    # Same normalization as src.apps.users.models.set_contact_hashes
+    op.execute(
+        """
+        UPDATE users SET
+            email_hash = CASE WHEN coalesce(trim(email), '') <> ''
+                THEN encode(sha256(convert_to(lower(trim(email)), 'UTF8')), 'hex')
+            END,
+            phone_hash = CASE
+                WHEN regexp_replace(coalesce(phone_number, ''), '\\D', '', 'g') <> ''
+                THEN encode(sha256(convert_to(
+                    regexp_replace(phone_number, '\\D', '', 'g'), 'UTF8'
+                )), 'hex')
+            END
+        """
+    )
+
+    op.create_index(op.f('ix_users_email_hash'), 'users', ['email_hash'], unique=False)
+    op.create_index(op.f('ix_users_phone_hash'), 'users', ['phone_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_phone_hash'), table_name='users')
+    op.drop_index(op.f('ix_users_email_hash'), table_name='users')
+    op.drop_column('users', 'phone_hash')
+    op.drop_column('users', 'email_hash')
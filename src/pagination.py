@@ -0,0 +1,52 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, literal, tuple_
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    try:
+        values = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if len(values) != len(types):
+            raise ValueError()
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor'
+        )
+
+
+def keyset_page(query: Select, key: Sequence, after: tuple | None, limit: int):
+    """Newest first by the `key` columns, strictly after `after`.
+
+    One extra row is fetched so split_page() can tell whether a next page exists.
+    """
+    if after:
+        bound = [literal(value, column.type) for value, column in zip(after, key)]
+        query = query.where(tuple_(*key) < tuple_(*bound))
+    return query.order_by(*(column.desc() for column in key)).limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence, limit: int, key: Callable[[Any], tuple]
+) -> tuple[list, str | None]:
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(*key(page[-1])) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval: float
+    func: Callable[[], Awaitable[None]]
+
+
+@dataclass
+class Scheduler:
+    jobs: list[PeriodicJob] = field(default_factory=list)
+    _tasks: list[asyncio.Task] = field(default_factory=list, init=False, repr=False)
+
+    def add_job(
+        self, name: str, interval: float, func: Callable[[], Awaitable[None]]
+    ) -> None:
+        self.jobs.append(PeriodicJob(name=name, interval=interval, func=func))
+
+    def start(self) -> None:
+        for job in self.jobs:
+            logger.info("Starting periodic job '%s' every %ss", job.name, job.interval)
+            self._tasks.append(asyncio.create_task(self._run(job), name=job.name))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.jobs.clear()
+
+    async def _run(self, job: PeriodicJob) -> None:
+        while True:
+            await asyncio.sleep(job.interval)
+            started_at = time.perf_counter()
+            try:
+                await job.func()
+            except Exception:
+                logger.exception("Periodic job '%s' failed", job.name)
+                metrics.counter('scheduler_job_failures_total', job=job.name).inc()
+            finally:
+                metrics.histogram('scheduler_job_seconds', job=job.name).observe(
+                    time.perf_counter() - started_at
+                )
+
+
+scheduler = Scheduler()
@@ -1,7 +1,6 @@
 import logging
 from pathlib import Path
 
-
 from pydantic import EmailStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -39,11 +38,122 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
 
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 2
+
+    REVOKED_TOKENS_FILTER_CAPACITY: int = 100_000
+    REVOKED_TOKENS_FILTER_ERROR_RATE: float = 0.001
+    REVOKED_TOKENS_SYNC_SECONDS: float = 5.0
+    REVOKED_TOKENS_SYNC_OVERLAP_SECONDS: float = 60.0
+    REVOKED_TOKENS_PURGE_SECONDS: float = 60.0 * 60
+
+    AUTH_RATE_LIMIT_BACKEND: str = 'memory'  # one of 'memory', 'mongo'
+    AUTH_RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    AUTH_RATE_LIMIT_PER_IDENTIFIER: int = 10
+    AUTH_RATE_LIMIT_PER_IP: int = 100
+    AUTH_RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 50_000
+
+    ACCOUNT_DELETION_PURGE_SECONDS: float = 30.0
+    ACCOUNT_DELETION_BATCH_SIZE: int = 1000
+    ACCOUNT_DELETION_BATCH_PAUSE_SECONDS: float = 0.05
+    ACCOUNT_DELETION_LEASE_SECONDS: float = 5.0 * 60
+    ACCOUNT_DELETION_MAX_ATTEMPTS: int = 5
+
+    FEED_FANOUT_MAX_FRIENDS: int = 5_000
+    FEED_FANOUT_MAX_POSTS_PER_DAY: int = 50
+    FEED_BACKFILL_POSTS: int = 50
+
+    TRENDING_HALF_LIFE_HOURS: float = 6
+    TRENDING_LIKE_WEIGHT: float = 1
+    TRENDING_COMMENT_WEIGHT: float = 3
+    TRENDING_TOP_K: int = 100
+    TRENDING_REFRESH_SECONDS: int = 60
+    TRENDING_CACHE_TTL_SECONDS: int = 180
+    # Scores decayed below this are dropped from post_scores
+    TRENDING_MIN_SCORE: float = 0.01
+
+    FRIEND_SUGGESTIONS_SNAPSHOT_SECONDS: int = 300
+    FRIEND_SUGGESTIONS_CACHE_TTL_SECONDS: int = 900
+    FRIEND_SUGGESTIONS_CACHE_MAX_SIZE: int = 50_000
+    FRIEND_SUGGESTIONS_LIMIT: int = 50
+    FRIEND_SUGGESTIONS_BUDGET_MS: int = 50
+    # Weight of a shared chat relative to a mutual friend; 0 disables it
+    FRIEND_SUGGESTIONS_CHAT_WEIGHT: float = 0.5
+
+    POST_COUNTERS_RECONCILE_SECONDS: int = 3600
+    POST_COUNTERS_RECONCILE_BATCH_SIZE: int = 1000
+    POST_COUNTERS_RECONCILE_BATCH_PAUSE_SECONDS: float = 0.05
+
+    USER_SEARCH_CACHE_TTL_SECONDS: float = 30.0
+    USER_SEARCH_CACHE_MAX_SIZE: int = 10_000
+
+    WS_HANDSHAKE_MAX_CONCURRENCY: int = 50
+    WS_HANDSHAKE_MAX_QUEUE: int = 500
+    WS_HANDSHAKE_QUEUE_TIMEOUT: float = 5.0
+    WS_HANDSHAKE_RETRY_AFTER: float = 1.0
+    WS_HANDSHAKE_RETRY_JITTER: float = 5.0
+
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
 
     OPENAI_API_KEY: str
+    # Point at a local stand-in (e.g. benchmarks/openai_stub.py) for testing
+    OPENAI_BASE_URL: str | None = None
+    OPENAI_MODEL: str = 'gpt-4o-mini'
+    OPENAI_MAX_CONCURRENCY: int = 16
+    # How long a request may wait for a free slot before it is rejected
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    OPENAI_MAX_CONNECTIONS: int = 32
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OPENAI_MAX_RETRIES: int = 2
+    # Answers are cached by model and normalized question
+    OPENAI_CACHE_TTL_SECONDS: float = 3600.0
+    OPENAI_CACHE_MAX_SIZE: int = 1000
+    OPENAI_CACHE_MAX_ANSWER_CHARS: int = 8000
+    # USD, used to report the cost saved by the cache
+    OPENAI_INPUT_PRICE_PER_1M_TOKENS: float = 0.15
+    OPENAI_OUTPUT_PRICE_PER_1M_TOKENS: float = 0.6
+    # Streamed @ai answers are broadcast at most this often (first token at once)
+    AI_STREAM_FLUSH_INTERVAL_MS: int = 50
+    # @ai questions get the chat's rolling summary and latest messages as
+    # context, within this many (estimated) tokens
+    AI_CONTEXT_TOKEN_BUDGET: int = 1200
+    AI_CONTEXT_RECENT_MESSAGES: int = 10
+    CHAT_SUMMARY_REFRESH_SECONDS: float = 60.0
+    # A chat is re-summarized once it has this many new messages, or any new
+    # messages and a summary older than CHAT_SUMMARY_MAX_AGE_SECONDS
+    CHAT_SUMMARY_MIN_NEW_MESSAGES: int = 20
+    CHAT_SUMMARY_MAX_AGE_SECONDS: float = 600.0
+    CHAT_SUMMARY_CHATS_PER_RUN: int = 50
+    CHAT_SUMMARY_BATCH_MESSAGES: int = 200
+    CHAT_SUMMARY_INPUT_TOKENS: int = 4000
+    CHAT_SUMMARY_MAX_TOKENS: int = 400
+    CHAT_SUMMARY_MESSAGE_MAX_CHARS: int = 1000
+    CHAT_SUMMARY_LEASE_SECONDS: float = 300.0
+    # @ai/@photo commands run on background workers; chats are sharded over
+    # them so each chat's commands run in order
+    BOT_COMMANDS_WORKERS: int = 8
+    BOT_COMMANDS_QUEUE_SIZE: int = 100
+    BOT_COMMANDS_MAX_ATTEMPTS: int = 3
+    BOT_COMMANDS_RETRY_BACKOFF_SECONDS: float = 1.0
+    BOT_COMMANDS_RETRY_AFTER_SECONDS: float = 5.0
+    BOT_COMMANDS_DRAIN_SECONDS: float = 10.0
     UNSPLASH_ACCESS_KEY: str
+    # Point at a local stand-in (e.g. benchmarks/unsplash_stub.py) for testing
+    UNSPLASH_BASE_URL: str = 'https://api.unsplash.com'
+    UNSPLASH_TIMEOUT_SECONDS: float = 10.0
+    UNSPLASH_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    UNSPLASH_MAX_CONNECTIONS: int = 20
+    UNSPLASH_HTTP2: bool = True
+    UNSPLASH_CACHE_TTL_SECONDS: float = 3600.0
+    UNSPLASH_CACHE_MAX_SIZE: int = 1000
+    UNSPLASH_BREAKER_FAILURE_THRESHOLD: int = 5
+    UNSPLASH_BREAKER_RESET_SECONDS: float = 30.0
 
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
@@ -53,6 +163,18 @@ class Settings(BaseSettings):
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
     MAIL_FROM_NAME: str = 'SmartMessenger'
+    MAIL_USE_CREDENTIALS: bool = True
+    MAIL_VALIDATE_CERTS: bool = True
+    MAIL_TIMEOUT_SECONDS: float = 30.0
+    MAIL_POOL_SIZE: int = 4
+    MAIL_BATCH_SIZE: int = 100
+    MAIL_RATE_PER_SECOND: float = 10.0
+    MAIL_MAX_ATTEMPTS: int = 8
+    MAIL_RETRY_BACKOFF_SECONDS: float = 30.0
+    MAIL_RETRY_BACKOFF_MAX_SECONDS: float = 60.0 * 60
+    MAIL_LEASE_SECONDS: float = 5.0 * 60
+    MAIL_POLL_SECONDS: float = 2.0
+    MAIL_DISPATCHER_IN_PROCESS: bool = False
 
     @property
     def POSTGRES_URL(self) -> str: